@@ -0,0 +1,107 @@
+"""
+Per-room registry of LiveKit transcription agents.
+
+At most one agent runs per room: repeated token requests for the same room (page
+refresh, a second participant) reuse the running agent instead of spawning another
+`Agent-AI` that would subscribe to the same tracks and double inference. The
+registry also owns each agent's `process_audio_track` tasks, so tearing a room down
+cancels everything that belongs to it.
+"""
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("asr-worker")
+
+
+class AgentHandle:
+    """Bookkeeping for one room's agent."""
+    def __init__(self, room_name: str):
+        self.room_name = room_name
+        self.started_at = time.time()
+        self.task = None
+        self.track_tasks = {}          # (participant identity, track sid) -> asyncio.Task
+        self.shutdown = asyncio.Event()  # set when the room should be left
+        self.participants = {}         # participant identity -> TrackBackpressure (lag report)
+
+    def add_track_task(self, key: tuple, coro) -> bool:
+        """Starts a track consumer unless one already runs for `key`."""
+        running = self.track_tasks.get(key)
+        if running is not None and not running.done():
+            coro.close()
+            return False
+        task = asyncio.create_task(coro)
+        self.track_tasks[key] = task
+
+        def _done(finished):
+            if self.track_tasks.get(key) is finished:
+                del self.track_tasks[key]
+        task.add_done_callback(_done)
+        return True
+
+    def cancel_tracks(self, identity: str = None):
+        """Cancels the track consumers of one participant (default: all)."""
+        for key, task in list(self.track_tasks.items()):
+            if identity is None or key[0] == identity:
+                task.cancel()
+
+    def info(self) -> dict:
+        return {
+            "room": self.room_name,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "tracks": len(self.track_tasks),
+            "participants": {identity: bp.info() for identity, bp in self.participants.items()},
+        }
+
+
+class AgentRegistry:
+    def __init__(self, on_finished=None):
+        self.agents = {}  # room name -> AgentHandle
+        self.spawns_deduplicated = 0
+        self.on_finished = on_finished  # called with the room name when its agent ends
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def spawn(self, room_name: str, run_agent) -> bool:
+        """
+        Starts `run_agent(handle)` for `room_name` unless an agent is already running there.
+        Returns False for a deduplicated spawn.
+        """
+        existing = self.agents.get(room_name)
+        if existing is not None and not existing.task.done():
+            self.spawns_deduplicated += 1
+            return False
+
+        handle = AgentHandle(room_name)
+        handle.task = asyncio.create_task(run_agent(handle))
+        self.agents[room_name] = handle
+        handle.task.add_done_callback(lambda _: self._finished(handle))
+        return True
+
+    def _finished(self, handle: AgentHandle):
+        handle.cancel_tracks()
+        if self.agents.get(handle.room_name) is handle:
+            del self.agents[handle.room_name]
+            if self.on_finished is not None:
+                try:
+                    self.on_finished(handle.room_name)
+                except Exception as e:
+                    logger.error(f"[AGENT] on_finished for {handle.room_name} failed: {e}")
+        logger.info(f"[AGENT] Agent for room {handle.room_name} finished ({len(self.agents)} active)")
+
+    async def stop_all(self):
+        handles = list(self.agents.values())
+        for handle in handles:
+            handle.shutdown.set()
+        if handles:
+            await asyncio.wait([h.task for h in handles], timeout=5)
+        for handle in handles:
+            handle.task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self.agents),
+            "spawns_deduplicated": self.spawns_deduplicated,
+            "rooms": [h.info() for h in self.agents.values()],
+        }
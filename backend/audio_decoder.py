@@ -0,0 +1,168 @@
+"""
+Incremental audio decoding for the WebSocket paths (`/ws` WebM/Opus, `/ws/pcm` raw PCM).
+
+The browser's MediaRecorder emits one continuous WebM stream split into chunks.
+Instead of re-decoding the whole accumulated buffer for every inference, each
+session keeps a single long-lived ffmpeg process: chunks are written to its stdin
+exactly once and 16 kHz mono PCM is read back from stdout as it is decoded.
+"""
+import logging
+import shutil
+import subprocess
+import threading
+
+import numpy as np
+
+from dsp import PCMConverter
+from ring_buffer import PCMRingBuffer
+
+logger = logging.getLogger("asr-worker")
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # int16
+
+
+class StreamingWebMDecoder:
+    """
+    Per-session streaming demuxer/decoder (WebM/Opus -> 16 kHz mono int16 PCM).
+    """
+    def __init__(self, sample_rate: int = SAMPLE_RATE, max_seconds: float = 5.0):
+        self.sample_rate = sample_rate
+
+        # Decoded PCM (int16) not yet moved into the session stream: the endpoint drains it
+        # after every chunk, so a few seconds covers any backlog
+        self.ring = PCMRingBuffer(int(sample_rate * max_seconds))
+        self.lock = threading.Lock()
+        self.closed = False
+
+        ffmpeg = shutil.which("ffmpeg") or "ffmpeg"
+        self.process = subprocess.Popen(
+            [
+                ffmpeg, "-hide_banner", "-loglevel", "error",
+                # Low-latency probing: start decoding as soon as the header is parsed
+                "-fflags", "nobuffer", "-probesize", "4096", "-analyzeduration", "0",
+                "-f", "webm", "-i", "pipe:0",
+                "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+
+        self.reader = threading.Thread(target=self._read_loop, daemon=True)
+        self.reader.start()
+
+    def _read_loop(self):
+        """Drains ffmpeg's stdout into the session PCM buffer."""
+        stdout = self.process.stdout
+        carry = b""
+        while True:
+            data = stdout.read(4096)
+            if not data:
+                break
+            # Pipe reads are not sample-aligned; carry a dangling byte to the next read
+            if carry:
+                data = carry + data
+            usable = len(data) - (len(data) % BYTES_PER_SAMPLE)
+            carry = data[usable:]
+            with self.lock:
+                self.ring.write(np.frombuffer(data, dtype="<i2", count=usable // BYTES_PER_SAMPLE))
+
+    @property
+    def samples_decoded(self) -> int:
+        return self.ring.total_written
+
+    def feed(self, chunk: bytes):
+        """Pushes one encoded WebM chunk into the decoder (consumed exactly once)."""
+        if self.closed or not chunk:
+            return
+        try:
+            self.process.stdin.write(chunk)
+        except (BrokenPipeError, ValueError, OSError) as e:
+            logger.error(f"[DECODER] ffmpeg stream closed: {e}")
+            self.closed = True
+
+    def read_from(self, index: int) -> tuple:
+        """
+        Zero-copy int16 view of the samples decoded since absolute index `index`, and the
+        index it ends at (pass that back next time). Counter and view are taken together
+        under the lock, so samples the reader thread appends meanwhile are left for the
+        next call instead of shifting the span. Consume the view right away (e.g.
+        `StreamingTranscriber.insert_audio`); it is overwritten once the ring wraps.
+        """
+        with self.lock:
+            end = self.ring.total_written
+            return self.ring.view(end - index, end=end), end
+
+    def close(self):
+        """Stops the ffmpeg process and its reader thread."""
+        self.closed = True
+        try:
+            self.process.stdin.close()
+        except Exception:
+            pass
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def kill(self):
+        """Stops ffmpeg at once, without blocking (teardown that cannot wait for `close`)."""
+        self.closed = True
+        self.process.kill()
+
+
+class RawPCMDecoder:
+    """
+    Decoder for the binary `/ws/pcm` protocol: interleaved int16/float32 PCM at any
+    sample rate, downmixed and resampled (polyphase, `dsp.PCMConverter`) to 16 kHz
+    mono int16 in-process.
+    Exposes the same interface as `StreamingWebMDecoder`.
+    """
+    ENCODINGS = {"s16le": np.dtype("<i2"), "f32le": np.dtype("<f4")}
+
+    def __init__(self, input_rate: int, encoding: str = "s16le", channels: int = 1,
+                 sample_rate: int = SAMPLE_RATE, max_seconds: float = 5.0):
+        if encoding not in self.ENCODINGS:
+            raise ValueError(f"Unsupported encoding '{encoding}'")
+        if channels not in (1, 2):
+            raise ValueError(f"Unsupported channel count {channels}")
+        if not 8000 <= input_rate <= 96000:
+            raise ValueError(f"Unsupported sample rate {input_rate}")
+
+        self.input_rate = input_rate
+        self.dtype = self.ENCODINGS[encoding]
+        self.channels = channels
+        self.sample_rate = sample_rate
+
+        self.ring = PCMRingBuffer(int(sample_rate * max_seconds))
+        self.lock = threading.Lock()
+        self.closed = False
+
+        # Partial frame carried over between binary messages
+        self._remainder = b""
+        self.converter = PCMConverter(input_rate, channels, sample_rate)
+
+    def feed(self, chunk: bytes):
+        """Consumes one binary frame of interleaved PCM."""
+        if self.closed or not chunk:
+            return
+        frame_bytes = self.dtype.itemsize * self.channels
+        data = self._remainder + chunk
+        usable = len(data) - (len(data) % frame_bytes)
+        self._remainder = data[usable:]
+        if usable == 0:
+            return
+
+        samples = np.frombuffer(data[:usable], dtype=self.dtype)
+        pcm = self.converter.process(samples)
+        with self.lock:
+            self.ring.write(pcm)
+
+    samples_decoded = StreamingWebMDecoder.samples_decoded
+    read_from = StreamingWebMDecoder.read_from
+
+    def close(self):
+        self.closed = True
+
@@ -0,0 +1,51 @@
+"""
+Dedicated, bounded executor for blocking audio work.
+
+ffmpeg pipe writes, process start/stop, base64 + PCM conversion and file decoding
+run here instead of on the event loop, so one session's decode cannot stall the
+other sessions' sockets and agents. The thread count is fixed and at most
+`max_pending` calls are queued or running; further callers wait their turn
+(backpressure) instead of piling up work behind a saturated pool. Inference keeps
+its own executor in the scheduler.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AudioExecutor:
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="asr-audio")
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self.waiting = 0    # callers queued for a slot
+        self.running = 0    # calls submitted to the pool
+        self.completed = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs `fn(*args, **kwargs)` on the audio threads and returns its result."""
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "threads": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,314 @@
+"""
+Measured `compute_type` x `cpu_threads` x `num_workers` for `MedicalASR`.
+
+Every supported combination is loaded locally (`model_store`), warmed up and timed
+on a fixture. `num_workers` concurrent calls run at once, as the checkout pool would
+issue them. With a real recording (`--fixture` / `ASR_AUTOTUNE_FIXTURE`), the fastest
+combination whose transcript stays within `max_wer` of the reference wins: the known
+transcript (`--reference` / `ASR_AUTOTUNE_REFERENCE`), else the most precise compute
+type's output. Without one, the bundled synthetic speech (`benchmarks.fixtures`) has no
+words to score, so the accuracy gate is skipped and only `cpu_threads` x `num_workers`
+are tuned for the configured compute type. The result is stored per host
+(hostname, CPU model, core count, ctranslate2 version), model and number of model copies
+in `ASR_AUTOTUNE_FILE`. Copies (`ASR_INSTANCES`, or `ASR_WORKER_PROCESSES` processes)
+run side by side, so each is tuned within its share of the cores.
+
+    python autotune.py --model small              # tune threads/workers and store
+    python autotune.py --model small --fixture visit.wav --reference visit.txt   # compute type too
+    python autotune.py --model small --copies 4   # for 4 instances/worker processes
+    python autotune.py --model small --show       # print the stored result
+    ASR_AUTOTUNE=cached|startup                   # apply it in MedicalASR (see settings_for)
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger("asr-worker")
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 10  # fixture windows, about what a streaming session sends
+DEFAULT_FILE = os.path.join(os.path.expanduser("~"), ".cache", "asr-worker", "autotune.json")
+# Most precise first: the first supported type is the accuracy reference
+COMPUTE_TYPES = {
+    "cpu": ("float32", "int16", "int8_float32", "int8"),
+    "cuda": ("float32", "float16", "int8_float16", "int8"),
+}
+MODES = ("off", "cached", "startup")
+
+
+def tune_file() -> str:
+    return os.getenv("ASR_AUTOTUNE_FILE", DEFAULT_FILE)
+
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def host_key(device: str = "cpu") -> str:
+    """Settings are only reused on the same host, CPU, core count, device and ctranslate2 build."""
+    import ctranslate2
+    return f"{socket.gethostname()}|{cpu_model()}|{os.cpu_count()}|{device}|ct2-{ctranslate2.__version__}"
+
+
+def load_results(path: str = None) -> dict:
+    try:
+        with open(path or tune_file()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def entry_key(model_size: str, copies: int = 1) -> str:
+    return model_size if copies <= 1 else f"{model_size}x{copies}"
+
+
+def configured_copies() -> int:
+    """Model copies sharing the host: worker processes (one instance each) or in-process instances."""
+    processes = int(os.getenv("ASR_WORKER_PROCESSES", 0))
+    return processes if processes > 0 else max(1, int(os.getenv("ASR_INSTANCES", 1)))
+
+
+def save_result(model_size: str, device: str, result: dict, path: str = None, copies: int = 1):
+    """Stores `result` under this host, model and copy count (atomic replace, other entries kept)."""
+    path = path or tune_file()
+    results = load_results(path)
+    results.setdefault(host_key(device), {})[entry_key(model_size, copies)] = result
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".autotune-")
+    with os.fdopen(fd, "w") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp, path)
+
+
+def cached_result(model_size: str, device: str = "cpu", copies: int = 1) -> dict:
+    return load_results().get(host_key(device), {}).get(entry_key(model_size, copies))
+
+
+def load_fixture(path: str = None, seconds: float = 30.0) -> np.ndarray:
+    """16 kHz mono float32: the recording at `path` (anything ffmpeg reads), else bundled synthetic speech."""
+    if path:
+        from bulk_transcribe import decode_pcm_blocks
+        from dsp import int16_to_float32
+        return int16_to_float32(np.concatenate(list(decode_pcm_blocks(path))))[:int(seconds * SAMPLE_RATE)]
+    from benchmarks.fixtures import speech_like
+    return speech_like(seconds, seed=7)
+
+
+def candidates(device: str = "cpu", cores: int = None, copies: int = 1) -> list:
+    """
+    `(compute_type, cpu_threads, num_workers)` to try for one of `copies` model copies:
+    threads x workers stays within that copy's share of the cores.
+    """
+    import ctranslate2
+    supported = ctranslate2.get_supported_compute_types(device)
+    compute_types = [c for c in COMPUTE_TYPES.get(device, COMPUTE_TYPES["cpu"]) if c in supported]
+    if device != "cpu":
+        return [(c, 0, w) for c in compute_types for w in (1, 2)]
+    cores = max(1, (cores or os.cpu_count() or 1) // max(1, copies))
+    threads = sorted({max(1, cores // d) for d in (1, 2, 4)}, reverse=True)
+    return [(c, t, w) for c in compute_types for t in threads for w in (1, 2, 4) if w == 1 or t * w <= cores]
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (r != h))
+    return row[-1] / len(ref)
+
+
+def measure(model_size: str, device: str, compute_type: str, cpu_threads: int, num_workers: int,
+            windows: list, rounds: int = 2) -> dict:
+    """Loads one combination and times `rounds` passes over the windows, `num_workers` at a time."""
+    from faster_whisper import WhisperModel
+    import model_store
+    # The verified copy in ASR_MODEL_DIR (what the server loads), else the hub cache; never downloads
+    model = WhisperModel(model_store.resolve(model_size), device=device, compute_type=compute_type,
+                         cpu_threads=cpu_threads, num_workers=num_workers, local_files_only=True)
+
+    def run(audio):
+        t_start = time.perf_counter()
+        segments, _ = model.transcribe(audio, beam_size=1, language="en", vad_filter=False,
+                                       condition_on_previous_text=False)
+        text = " ".join(s.text for s in segments).strip()
+        return text, time.perf_counter() - t_start
+
+    run(windows[0])  # warm-up: buffer allocation, first-call kernels
+    latencies, texts = [], None
+    with ThreadPoolExecutor(num_workers) as pool:
+        t_start = time.perf_counter()
+        for _ in range(rounds):
+            results = list(pool.map(run, windows))
+            texts = texts or [text for text, _ in results]
+            latencies.extend(elapsed for _, elapsed in results)
+        elapsed = time.perf_counter() - t_start
+    del model
+    audio_seconds = rounds * sum(len(w) for w in windows) / SAMPLE_RATE
+    return {
+        "compute_type": compute_type,
+        "cpu_threads": cpu_threads,
+        "num_workers": num_workers,
+        "rtf": round(elapsed / audio_seconds, 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "text": " ".join(texts),
+    }
+
+
+def autotune(model_size: str, device: str = "cpu", fixture: str = None, max_wer: float = 0.1,
+             rounds: int = 2, store: bool = True, copies: int = 1, reference: str = None) -> dict:
+    """
+    Benchmarks every candidate and returns (and stores) the fastest one within `max_wer`
+    of the reference transcript (the text file `reference`, else the most precise compute
+    type's output). The gate needs a real recording: without `fixture` the compute type
+    stays the configured one (`WHISPER_COMPUTE`) and only threads/workers are tuned.
+    """
+    audio = load_fixture(fixture)
+    window = WINDOW_SECONDS * SAMPLE_RATE
+    windows = [audio[i:i + window] for i in range(0, len(audio), window) if len(audio) - i >= SAMPLE_RATE]
+    combos = candidates(device, copies=copies)
+    if not combos:
+        raise RuntimeError(f"no supported compute types for device '{device}'")
+    gated = fixture is not None
+    if not gated:
+        configured = os.getenv("WHISPER_COMPUTE", "int8")
+        pinned = configured if any(c[0] == configured for c in combos) else combos[0][0]
+        combos = [c for c in combos if c[0] == pinned]
+        logger.warning(f"[TUNE] ⚠️ No --fixture: synthetic audio has no transcript to check accuracy against, so "
+                       f"compute_type stays '{pinned}' and only threads/workers are tuned")
+    expected = None
+    if gated and reference:
+        with open(reference) as f:
+            expected = f.read().strip()
+
+    logger.info(f"[TUNE] Benchmarking {len(combos)} combination(s) of '{model_size}' on {device} "
+                f"(1 of {copies} cop{'y' if copies == 1 else 'ies'}, {len(audio) / SAMPLE_RATE:.0f}s fixture, "
+                f"{rounds} round(s))...")
+    measured = []
+    for compute_type, cpu_threads, num_workers in combos:
+        try:
+            result = measure(model_size, device, compute_type, cpu_threads, num_workers, windows, rounds)
+        except Exception as e:
+            logger.warning(f"[TUNE] {compute_type}/{cpu_threads}t/{num_workers}w failed: {e}")
+            continue
+        result["wer"] = None
+        if gated:
+            if expected is None:
+                expected = result["text"]
+            result["wer"] = round(word_error_rate(expected, result["text"]), 3)
+        measured.append(result)
+        logger.info(f"[TUNE] {compute_type:<13} threads={cpu_threads:<3} workers={num_workers} "
+                    f"rtf={result['rtf']:.3f} p50={result['p50_ms']:.0f}ms wer={_fmt_wer(result['wer'])}")
+    if not measured:
+        raise RuntimeError(f"could not load '{model_size}' in any configuration (is it downloaded?)")
+
+    accurate = [r for r in measured if not gated or r["wer"] <= max_wer]
+    if not accurate:
+        raise RuntimeError(f"no combination within max_wer {max_wer} of the reference transcript")
+    best = min(accurate, key=lambda r: r["rtf"])
+    result = {
+        "compute_type": best["compute_type"],
+        "cpu_threads": best["cpu_threads"],
+        "num_workers": best["num_workers"],
+        "rtf": best["rtf"],
+        "wer": best["wer"],
+        "max_wer": max_wer if gated else None,
+        "reference": (reference or "most precise compute type") if gated else None,
+        "copies": copies,
+        "fixture": fixture or "synthetic",
+        "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "candidates": [{k: v for k, v in r.items() if k != "text"} for r in measured],
+    }
+    if store:
+        save_result(model_size, device, result, copies=copies)
+    logger.info(f"[TUNE] ✅ {model_size}: compute_type={result['compute_type']} cpu_threads={result['cpu_threads']} "
+                f"num_workers={result['num_workers']} (rtf {result['rtf']:.3f}, wer {_fmt_wer(result['wer'])})")
+    return result
+
+
+def _fmt_wer(wer: float) -> str:
+    return "n/a (no fixture)" if wer is None else f"{wer:.3f}"
+
+
+def settings_for(model_size: str, device: str = "cpu", mode: str = None, copies: int = 1) -> dict:
+    """
+    Load options for each of `copies` model copies under `ASR_AUTOTUNE`: `off` -> {},
+    `cached` -> the stored result for this host (or {}), `startup` -> stored result,
+    tuning now if there is none.
+    """
+    mode = mode or os.getenv("ASR_AUTOTUNE", "off")
+    if mode not in MODES:
+        raise ValueError(f"ASR_AUTOTUNE must be one of {', '.join(MODES)} (got '{mode}')")
+    if mode == "off":
+        return {}
+    result = cached_result(model_size, device, copies)
+    if result is None and mode == "startup":
+        try:
+            result = autotune(model_size, device, fixture=os.getenv("ASR_AUTOTUNE_FIXTURE") or None,
+                              max_wer=float(os.getenv("ASR_AUTOTUNE_MAX_WER", 0.1)), copies=copies,
+                              reference=os.getenv("ASR_AUTOTUNE_REFERENCE") or None)
+        except Exception as e:
+            logger.warning(f"[TUNE] Autotune failed, using the configured settings: {e}")
+    if result is None:
+        return {}
+    return {k: result[k] for k in ("compute_type", "cpu_threads", "num_workers")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper load settings on this host and store the fastest")
+    parser.add_argument("--model", default=os.getenv("MODEL_SIZE", "small"))
+    parser.add_argument("--device", default=os.getenv("WHISPER_DEVICE", "cpu"))
+    parser.add_argument("--fixture", default=os.getenv("ASR_AUTOTUNE_FIXTURE"),
+                        help="speech recording (required to tune compute_type; default: synthetic audio, no accuracy gate)")
+    parser.add_argument("--reference", default=os.getenv("ASR_AUTOTUNE_REFERENCE"),
+                        help="text file with the fixture's transcript (default: the most precise compute type's output)")
+    parser.add_argument("--max-wer", type=float, default=float(os.getenv("ASR_AUTOTUNE_MAX_WER", 0.1)),
+                        help="accuracy tolerance against the reference transcript (with --fixture)")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--copies", type=int, default=configured_copies(),
+                        help="model copies sharing the host (ASR_INSTANCES or ASR_WORKER_PROCESSES)")
+    parser.add_argument("--show", action="store_true", help="print the stored result for this host and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.show:
+        result = cached_result(args.model, args.device, args.copies)
+        print(json.dumps(result, indent=2) if result else f"No stored result for '{args.model}' on {host_key(args.device)}")
+        return 0 if result else 1
+    try:
+        result = autotune(args.model, args.device, args.fixture, args.max_wer, args.rounds, copies=args.copies,
+                          reference=args.reference)
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        return 1
+    print(f"\n[SUCCESS] Stored in {tune_file()}:")
+    print(f"          WHISPER_COMPUTE={result['compute_type']} ASR_CPU_THREADS={result['cpu_threads']} "
+          f"ASR_NUM_WORKERS={result['num_workers']}")
+    if result["wer"] is None:
+        print("          Accuracy not checked (no --fixture): compute_type was not tuned")
+    else:
+        print(f"          WER {result['wer']:.3f} against {result['reference']} (max {result['max_wer']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Backpressure for LiveKit agent tracks.
+
+Audio keeps arriving in real time whether or not inference keeps up; while a pass is
+in flight the frames accumulate in the session's stream. `TrackBackpressure` caps
+every pass at `max_window_s` of audio, so the cost per call stays bounded, and
+decides what happens to uncommitted audio beyond that cap (`AGENT_BACKPRESSURE`):
+
+  * coalesce     - keep everything; the backlog is decoded oldest-first in capped
+                   windows, back to back (no loss while the backlog fits the stream's
+                   ring; lag recovers once load drops)
+  * drop_oldest  - keep the newest `max_window_s`, discard older uncommitted audio
+  * skip         - discard the backlog and resume at the live edge (lowest lag)
+
+Audio lost under any strategy (including a backlog that outgrows the ring) is counted
+in `asr_audio_discarded_seconds_total`. It also measures lag: how far behind real time
+each published result is.
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+import metrics
+
+STRATEGIES = ("coalesce", "drop_oldest", "skip")
+
+
+def check_strategy(name: str) -> str:
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown AGENT_BACKPRESSURE '{name}' (expected one of: {', '.join(STRATEGIES)})")
+    return name
+
+
+class TrackBackpressure:
+    """
+    Backpressure state of one participant's track over its `StreamingTranscriber`.
+    The agent loop calls `on_frame` per frame, `prepare` to pick the next window and
+    `record` once that window's transcript is published.
+    """
+    def __init__(self, stream, strategy: str = "coalesce", max_window_s: float = 8.0):
+        self.stream = stream
+        self.strategy = check_strategy(strategy)
+        self.sample_rate = stream.sample_rate
+        self.max_samples = int(max_window_s * self.sample_rate)
+        self.last_frame_at = time.time()
+        self.last_end = 0                # absolute sample index where the last window ended
+        self.lags = deque(maxlen=256)    # recent lag readings (seconds)
+        self.discarded_samples = 0
+        self.windows = 0
+        self.capped_windows = 0
+
+    def on_frame(self):
+        self.last_frame_at = time.time()
+
+    @property
+    def backlog_seconds(self) -> float:
+        """Audio received but not yet covered by any pass."""
+        return max(0, self.stream.ring.total_written - self.last_end) / self.sample_rate
+
+    def prepare(self, keep_samples: int = 0) -> tuple:
+        """
+        Applies the strategy and returns `(audio, end, committed)`: the next window, the
+        absolute index where it ends, and any text committed because the audio under it
+        was discarded. `keep_samples` is the lead-in kept at the live edge by `skip`.
+        """
+        stream = self.stream
+        total = stream.ring.total_written
+        committed = ""
+        pending = total - max(stream.start, stream.ring.oldest_index)
+        if pending > self.max_samples and self.strategy != "coalesce":
+            keep = self.max_samples if self.strategy == "drop_oldest" else min(keep_samples, self.max_samples)
+            before = stream.start
+            committed = stream.drop_before(total - keep)
+            decoded = int(stream.last_committed_time * self.sample_rate)  # committed words were not lost
+            discarded = max(0, stream.start - max(before, decoded))
+            self.discarded_samples += discarded
+            metrics.AUDIO_DISCARDED_SECONDS.inc(discarded / self.sample_rate, strategy=self.strategy)
+
+        # The ring only holds so much: a backlog older than that has been overwritten
+        overrun = stream.ring.oldest_index - stream.start
+        if overrun > 0:
+            self.discarded_samples += overrun
+            metrics.AUDIO_DISCARDED_SECONDS.inc(overrun / self.sample_rate, strategy=self.strategy)
+
+        audio, end = stream.window(self.max_samples)
+        self.windows += 1
+        if end < total:
+            self.capped_windows += 1
+        self.last_end = end
+        return audio, end, committed
+
+    def record(self, end: int) -> float:
+        """Lag of a result covering audio up to `end`: age of the newest frame plus audio received since `end`."""
+        lag = (time.time() - self.last_frame_at) + max(0, self.stream.ring.total_written - end) / self.sample_rate
+        self.lags.append(lag)
+        metrics.AGENT_LAG_SECONDS.observe(lag)
+        return lag
+
+    @property
+    def lag(self) -> float:
+        return self.lags[-1] if self.lags else 0.0
+
+    def info(self) -> dict:
+        lags = np.asarray(self.lags) if self.lags else np.zeros(1)
+        return {
+            "strategy": self.strategy,
+            "lag_s": round(self.lag, 2),
+            "lag_p50_s": round(float(np.percentile(lags, 50)), 2),
+            "lag_p95_s": round(float(np.percentile(lags, 95)), 2),
+            "backlog_s": round(self.backlog_seconds, 2),
+            "discarded_s": round(self.discarded_samples / self.sample_rate, 2),
+            "windows": self.windows,
+            "capped_windows": self.capped_windows,
+        }
@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the transcription pipeline (no network, no model download).
+
+    python -m benchmarks.bench_pipeline      # per-stage latency/throughput/allocations
+"""
@@ -0,0 +1,356 @@
+"""
+Per-stage micro-benchmarks of the real pipeline code on synthesized fixtures.
+
+Stages: base64 decode, WebM decode (ffmpeg), PCM resample, 48k stereo -> 16k mono
+conversion (`dsp` vs the pydub route and the previous linear resampler), level
+metering, ring buffer + VAD, LocalAgreement merge, `filter_hallucinations`,
+scheduler + stub model and, optionally, a real Whisper model loaded from the local
+cache only.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --json bench.json
+    python -m benchmarks.bench_pipeline --compare bench.json --tolerance 0.25
+    python -m benchmarks.bench_pipeline --real-model tiny
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import dsp
+from audio_decoder import RawPCMDecoder, StreamingWebMDecoder
+from benchmarks import fixtures
+from benchmarks.stub_model import StubASR
+from inference_scheduler import InferenceScheduler
+from streaming import StreamingTranscriber
+from vad import StreamingVAD
+
+SAMPLE_RATE = 16000
+
+
+def measure(name: str, fn, iterations: int, units: float = 1.0, unit: str = "calls", warmup: int = 2,
+            alloc_iterations: int = 3) -> dict:
+    """
+    Times `fn()` per call (p50/p99), derives throughput as `units` per second, then
+    re-runs a few calls under tracemalloc to report allocated bytes per call.
+    """
+    for _ in range(warmup):
+        fn()
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - t0
+
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(alloc_iterations):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        allocated += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        "stage": name,
+        "calls": iterations,
+        "p50_ms": float(np.percentile(timings, 50) * 1000),
+        "p99_ms": float(np.percentile(timings, 99) * 1000),
+        "throughput": float(units / np.median(timings)) if np.median(timings) > 0 else float("inf"),
+        "unit": f"{unit}/s",
+        "alloc_kib": allocated / alloc_iterations / 1024,
+    }
+
+
+# --- Stages ---
+
+def bench_base64(chunks: list, iterations: int) -> dict:
+    encoded = [base64.b64encode(c).decode("ascii") for c in chunks]
+    total = sum(len(c) for c in chunks) / 1e6
+
+    def run():
+        for message in encoded:
+            base64.b64decode(message)
+    return measure("base64_decode", run, iterations, units=total, unit="MB")
+
+
+def bench_webm_decode(chunks: list, seconds: float, iterations: int) -> dict:
+    expected = int(seconds * SAMPLE_RATE * 0.95)  # encoder priming/padding trims a little
+
+    def run():
+        decoder = StreamingWebMDecoder()
+        try:
+            for chunk in chunks:
+                decoder.feed(chunk)
+            deadline = time.perf_counter() + 10
+            while decoder.samples_decoded < expected and time.perf_counter() < deadline:
+                time.sleep(0.001)
+        finally:
+            decoder.close()
+    return measure("webm_decode", run, iterations, units=seconds, unit="audio_s", warmup=1, alloc_iterations=1)
+
+
+def bench_resample(audio: np.ndarray, seconds: float, iterations: int, input_rate: int = 48000) -> dict:
+    pcm = fixtures.to_interleaved(audio, SAMPLE_RATE, input_rate)
+    frame_bytes = input_rate // 50 * 2  # 20 ms frames, as an AudioWorklet would send
+    frames = [pcm[i:i + frame_bytes] for i in range(0, len(pcm), frame_bytes)]
+
+    decoder = RawPCMDecoder(input_rate)  # steady state: session setup is not timed
+
+    def run():
+        for frame in frames:
+            decoder.feed(frame)
+    return measure(f"resample_{input_rate // 1000}k", run, iterations, units=seconds, unit="audio_s")
+
+
+def _stereo_frames(audio: np.ndarray, input_rate: int = 48000, frame_ms: int = 20) -> list:
+    pcm = np.frombuffer(fixtures.to_interleaved(audio, SAMPLE_RATE, input_rate, channels=2), dtype=np.int16)
+    step = input_rate * frame_ms // 1000 * 2
+    return [pcm[i:i + step] for i in range(0, len(pcm), step)]
+
+
+def bench_convert_dsp(audio: np.ndarray, seconds: float, iterations: int) -> dict:
+    frames = _stereo_frames(audio)
+    converter = dsp.PCMConverter(48000, channels=2)
+
+    def run():
+        for frame in frames:
+            converter.process(frame)
+    return measure("convert_dsp", run, iterations, units=seconds, unit="audio_s")
+
+
+def bench_convert_linear(audio: np.ndarray, seconds: float, iterations: int) -> dict:
+    """The previous in-process route: float conversion, mean downmix and `np.interp`."""
+    frames = _stereo_frames(audio)
+    step = 48000 / SAMPLE_RATE
+
+    def run():
+        pos, last = 1.0, 0.0
+        for frame in frames:
+            samples = (frame.astype(np.float32) / 32768.0).reshape(-1, 2).mean(axis=1)
+            x = np.empty(len(samples) + 1, dtype=np.float32)
+            x[0], x[1:] = last, samples
+            positions = np.arange(pos, len(x) - 1, step)
+            out = np.interp(positions, np.arange(len(x)), x).astype(np.float32)
+            (out * 32767).astype(np.int16)
+            pos = (positions[-1] + step if len(positions) else pos) - (len(x) - 1)
+            last = x[-1]
+    return measure("convert_linear", run, iterations, units=seconds, unit="audio_s")
+
+
+def bench_convert_pydub(audio: np.ndarray, seconds: float, iterations: int) -> dict:
+    """The pydub route: `set_channels(1).set_frame_rate(16000)` per frame."""
+    from pydub import AudioSegment
+    frames = [f.tobytes() for f in _stereo_frames(audio)]
+
+    def run():
+        for frame in frames:
+            AudioSegment(data=frame, sample_width=2, frame_rate=48000, channels=2) \
+                .set_channels(1).set_frame_rate(SAMPLE_RATE).raw_data
+    return measure("convert_pydub", run, iterations, units=seconds, unit="audio_s")
+
+
+def bench_levels(audio: np.ndarray, seconds: float, iterations: int, use_pydub: bool = False) -> dict:
+    """RMS + peak level of every 0.6s window (the WebSocket path's input level check)."""
+    pcm = fixtures.to_int16(audio)
+    step = int(SAMPLE_RATE * 0.6)
+    windows = [pcm[i:i + step] for i in range(0, len(pcm), step)]
+    if use_pydub:
+        from pydub import AudioSegment
+        segments = [AudioSegment(data=w.tobytes(), sample_width=2, frame_rate=SAMPLE_RATE, channels=1) for w in windows]
+
+        def run():
+            for segment in segments:
+                segment.dBFS, segment.max_dBFS
+        return measure("levels_pydub", run, iterations, units=seconds, unit="audio_s")
+
+    def run():
+        for window in windows:
+            dsp.level_dbfs(window), dsp.peak_dbfs(window)
+    return measure("levels_dsp", run, iterations, units=seconds, unit="audio_s")
+
+
+def bench_buffer_vad(audio: np.ndarray, seconds: float, iterations: int) -> dict:
+    pcm = fixtures.to_int16(audio)
+    step = SAMPLE_RATE // 50
+    frames = [pcm[i:i + step] for i in range(0, len(pcm), step)]
+
+    stream = StreamingTranscriber()
+    vad = StreamingVAD()
+
+    def run():
+        for i, frame in enumerate(frames):
+            stream.insert_audio(frame)
+            vad.process(frame)
+            if i % 30 == 0:  # a pass every 0.6s reads the uncommitted tail
+                stream.buffer
+                if not vad.in_speech:
+                    stream.skip_silence(vad.samples_seen - vad.preroll_samples)
+    return measure("ring_buffer_vad", run, iterations, units=seconds, unit="audio_s")
+
+
+def bench_local_agreement(audio: np.ndarray, seconds: float, iterations: int, model: StubASR) -> dict:
+    pcm = fixtures.to_int16(audio)
+    step = int(SAMPLE_RATE * 0.6)
+    # Precompute the stub's hypotheses so only the merge logic is timed
+    passes = []
+    stream = StreamingTranscriber()
+    for i in range(0, len(pcm), step):
+        stream.insert_audio(pcm[i:i + step])
+        words = model.words(stream.buffer)
+        passes.append((pcm[i:i + step], words))
+        stream.apply(words)
+
+    def run():
+        stream = StreamingTranscriber()
+        for chunk, words in passes:
+            stream.insert_audio(chunk)
+            stream.apply(words)
+        stream.finalize()
+    return measure("local_agreement", run, iterations, units=seconds, unit="audio_s")
+
+
+def bench_hallucination_filter(iterations: int) -> dict:
+    from main import filter_hallucinations
+    texts = ["Thank you.", "The patient reports mild chest pain since yesterday.", "You",
+             "Thank you doc", "Blood pressure is normal.", "Amara.org", ""] * 100
+
+    def run():
+        for text in texts:
+            filter_hallucinations(text)
+    return measure("filter_hallucinations", run, iterations, units=len(texts), unit="texts")
+
+
+def bench_scheduler(audio: np.ndarray, iterations: int, model, name: str, sessions: int = 4,
+                    window_seconds: float = 3.0) -> dict:
+    window = audio[:int(window_seconds * SAMPLE_RATE)].astype(np.float32)
+    loop = asyncio.new_event_loop()
+    scheduler = InferenceScheduler(model, max_batch_size=sessions)
+
+    async def one_round():
+        await asyncio.gather(*[
+            scheduler.submit(f"bench-{i}", window, "en", vad_filter=False, word_timestamps=True)
+            for i in range(sessions)
+        ])
+
+    try:
+        return measure(name, lambda: loop.run_until_complete(one_round()), iterations,
+                       units=window_seconds * sessions, unit="audio_s", alloc_iterations=1)
+    finally:
+        loop.run_until_complete(scheduler.stop())
+        loop.close()
+
+
+def load_real_model(size: str):
+    """`MedicalASR` with a locally cached model, or None (never downloads)."""
+    from faster_whisper import WhisperModel
+    try:
+        WhisperModel(size, device="cpu", compute_type="int8", local_files_only=True)
+    except Exception as e:
+        print(f"⚠️  Skipping real model benchmark: '{size}' not in the local cache ({e})")
+        return None
+    os.environ["MODEL_SIZE"] = size
+    from main import MedicalASR
+    return MedicalASR()
+
+
+def pydub_available() -> bool:
+    try:
+        import pydub  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# --- Reporting ---
+
+def print_table(results: list):
+    print(f"\n{'stage':<24}{'p50 ms':>10}{'p99 ms':>10}{'throughput':>22}{'alloc KiB':>12}")
+    print("-" * 78)
+    for r in results:
+        throughput = f"{r['throughput']:,.1f} {r['unit']}"
+        print(f"{r['stage']:<24}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{throughput:>22}{r['alloc_kib']:>12.1f}")
+
+
+def compare(results: list, baseline_path: str, tolerance: float) -> list:
+    """Stages whose p50 regressed by more than `tolerance` relative to the baseline."""
+    with open(baseline_path) as f:
+        baseline = {r["stage"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        before = baseline.get(r["stage"])
+        if before and r["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{r['stage']}: p50 {before['p50_ms']:.3f}ms -> {r['p50_ms']:.3f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    parser.add_argument("--seconds", type=float, default=30.0, help="fixture length")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--stub-rtf", type=float, default=0.0, help="simulated inference cost of the stub")
+    parser.add_argument("--real-model", default=None, help="also benchmark a cached Whisper model (e.g. tiny)")
+    parser.add_argument("--json", default=None, help="write results to this file")
+    parser.add_argument("--compare", default=None, help="baseline JSON; exit 1 on p50 regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    audio = fixtures.speech_like(args.seconds)
+    stub = StubASR(rtf=args.stub_rtf)
+    results = []
+
+    if fixtures.ffmpeg_available():
+        chunks = fixtures.split_chunks(fixtures.encode_webm(audio), args.seconds)
+        results.append(bench_base64(chunks, args.iterations))
+        results.append(bench_webm_decode(chunks, args.seconds, max(3, args.iterations // 4)))
+    else:
+        print("⚠️  ffmpeg not found: skipping base64/WebM stages")
+    results.append(bench_resample(audio, args.seconds, args.iterations))
+    results.append(bench_convert_dsp(audio, args.seconds, args.iterations))
+    results.append(bench_convert_linear(audio, args.seconds, args.iterations))
+    results.append(bench_levels(audio, args.seconds, args.iterations))
+    if pydub_available():
+        results.append(bench_convert_pydub(audio, args.seconds, max(3, args.iterations // 4)))
+        results.append(bench_levels(audio, args.seconds, args.iterations, use_pydub=True))
+    else:
+        print("⚠️  pydub not installed: skipping the pydub comparison stages")
+    results.append(bench_buffer_vad(audio, args.seconds, args.iterations))
+    results.append(bench_local_agreement(audio, args.seconds, args.iterations, stub))
+    results.append(bench_hallucination_filter(args.iterations))
+    results.append(bench_scheduler(audio, args.iterations, stub, "inference_stub"))
+
+    if args.real_model:
+        model = load_real_model(args.real_model)
+        if model is not None:
+            results.append(bench_scheduler(audio, max(3, args.iterations // 4), model,
+                                           f"inference_{args.real_model}", sessions=1))
+
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"seconds": args.seconds, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ No p50 regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Deterministic audio fixtures for the benchmarks.
+
+Nothing binary is checked in: "speech" is synthesized (voiced syllables with pitch,
+formant-like harmonics and short gaps, plus pauses between phrases) from a seed, and
+WebM/Opus fixtures are encoded from it with ffmpeg, the same codec the browser's
+MediaRecorder produces for `/ws`.
+"""
+import base64
+import shutil
+import subprocess
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def speech_like(seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0,
+                pause_every: float = 3.0, pause_seconds: float = 0.8) -> np.ndarray:
+    """float32 mono in [-1, 1]: syllables of 0.2-0.4 s separated by 60-120 ms gaps."""
+    rng = np.random.default_rng(seed)
+    out = np.zeros(int(seconds * sample_rate), dtype=np.float32)
+    pos, phrase_start = 0, 0
+    while pos < len(out):
+        if (pos - phrase_start) / sample_rate >= pause_every:
+            pos += int(pause_seconds * sample_rate)
+            phrase_start = pos
+            continue
+        n = int(rng.uniform(0.2, 0.4) * sample_rate)
+        t = np.arange(n) / sample_rate
+        f0 = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        envelope = np.sin(np.pi * np.arange(n) / n) ** 0.5
+        syllable = (0.3 * voiced * envelope + 0.01 * rng.standard_normal(n)).astype(np.float32)
+        end = min(len(out), pos + n)
+        out[pos:end] = syllable[:end - pos]
+        pos = end + int(rng.uniform(0.06, 0.12) * sample_rate)
+    return np.clip(out, -1.0, 1.0)
+
+
+def to_int16(audio: np.ndarray) -> np.ndarray:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def to_interleaved(audio: np.ndarray, rate_in: int, rate_out: int, channels: int = 1) -> bytes:
+    """Client-side capture format for `/ws/pcm`: int16 at `rate_out`, interleaved."""
+    n_out = int(len(audio) * rate_out / rate_in)
+    resampled = np.interp(np.arange(n_out) * rate_in / rate_out, np.arange(len(audio)), audio)
+    pcm = to_int16(resampled)
+    if channels > 1:
+        pcm = np.repeat(pcm, channels)
+    return pcm.tobytes()
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def encode_webm(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Encodes to WebM/Opus at 48 kHz (what MediaRecorder emits)."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-i", "pipe:0",
+            "-c:a", "libopus", "-b:a", "32k", "-ar", "48000", "-f", "webm", "pipe:1",
+        ],
+        input=to_int16(audio).tobytes(), capture_output=True, check=True,
+    )
+    return result.stdout
+
+
+def split_chunks(data: bytes, seconds: float, chunk_ms: int = 250) -> list:
+    """Splits an encoded stream into roughly `chunk_ms` pieces (MediaRecorder timeslices)."""
+    count = max(1, int(seconds * 1000 / chunk_ms))
+    size = -(-len(data) // count)
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def audio_chunk_messages(chunks: list, language: str = "en") -> list:
+    """`/ws` client messages for a list of WebM chunks."""
+    return [
+        {"type": "audio_chunk", "data": base64.b64encode(c).decode("ascii"), "language": language}
+        for c in chunks
+    ]
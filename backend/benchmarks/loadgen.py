@@ -0,0 +1,221 @@
+"""
+Concurrent-session load generator for the `/ws` endpoint.
+
+Runs the FastAPI app in-process (uvicorn on a local port) with the stub inference
+backend, then ramps up simulated browser clients. Each client streams the WebM
+fixture as `audio_chunk` messages at real-time pace (one MediaRecorder timeslice
+every `--chunk-ms`). Per concurrency level it reports server TAT and client-side
+lag (p50/p95/p99), transcripts per second, CPU and RSS, and the first level at
+which p95 TAT breaches the SLO.
+
+Usage (from backend/):
+    python -m benchmarks.loadgen --levels 1,2,4,8,16 --slo-ms 1500
+    python -m benchmarks.loadgen --levels 8 --seconds 20 --stub-rtf 0.1 --stub-slots 2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+import uvicorn
+import websockets
+
+from benchmarks import fixtures
+from benchmarks.stub_model import StubASR
+
+
+def rss_mib() -> float:
+    """Current resident set size (Linux /proc; falls back to the peak)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process and its reaped children (the per-session ffmpeg decoders)."""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(backend, port: int) -> uvicorn.Server:
+    """Serves `main.app` on a background thread with `backend` as the inference engine."""
+    import main
+    main.asr_engine = backend  # the lifespan keeps an already set engine
+    logging.getLogger("asr-worker").setLevel(logging.WARNING)  # per-pass INFO logs would dominate CPU
+
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 30
+    # Wait for the listener and for the background warm-up to finish
+    while not (server.started and main.model_ready()):
+        if main.model_state == "failed" or time.time() > deadline:
+            raise RuntimeError(f"server did not become ready (model {main.model_state})")
+        time.sleep(0.05)
+    return server
+
+
+async def run_client(url: str, messages: list, chunk_seconds: float, result: dict):
+    """One simulated browser: streams at real-time pace and records every transcript."""
+    last_sent = [0.0]
+
+    async def receive(ws):
+        async for raw in ws:
+            msg = json.loads(raw)
+            if msg.get("type") != "transcript":
+                continue
+            now = time.perf_counter()
+            result["tat_ms"].append(msg.get("turnaround_ms", 0))
+            result["lag_ms"].append((now - last_sent[0]) * 1000)
+            result["finals" if msg.get("isFinal", True) else "partials"] += 1
+
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            receiver = asyncio.create_task(receive(ws))
+            start = time.perf_counter()
+            for i, message in enumerate(messages):
+                # Real-time pacing against the session clock (no drift accumulation)
+                delay = start + i * chunk_seconds - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await ws.send(json.dumps(message))
+                last_sent[0] = time.perf_counter()
+            # Let the trailing endpoint pass finish
+            await asyncio.sleep(2.0)
+            receiver.cancel()
+    except Exception as e:
+        result["errors"] += 1
+        logging.getLogger("loadgen").warning(f"client failed: {e}")
+
+
+def percentile(values: list, q: float) -> float:
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+async def run_level(url: str, sessions: int, messages: list, chunk_seconds: float, seconds: float) -> dict:
+    results = [{"tat_ms": [], "lag_ms": [], "finals": 0, "partials": 0, "errors": 0} for _ in range(sessions)]
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    rss_peak = rss_mib()
+
+    async def sample_rss():
+        nonlocal rss_peak
+        while True:
+            rss_peak = max(rss_peak, rss_mib())
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample_rss())
+    # Stagger connects over one chunk so sessions don't all hit the scheduler in lockstep
+    clients = []
+    for i, r in enumerate(results):
+        clients.append(asyncio.create_task(run_client(url, messages, chunk_seconds, r)))
+        await asyncio.sleep(chunk_seconds / sessions)
+    await asyncio.gather(*clients)
+    sampler.cancel()
+
+    wall = time.perf_counter() - wall_start
+    tat = [t for r in results for t in r["tat_ms"]]
+    lag = [t for r in results for t in r["lag_ms"]]
+    transcripts = sum(r["finals"] + r["partials"] for r in results)
+    return {
+        "sessions": sessions,
+        "tat_p50_ms": percentile(tat, 50),
+        "tat_p95_ms": percentile(tat, 95),
+        "tat_p99_ms": percentile(tat, 99),
+        "lag_p95_ms": percentile(lag, 95),
+        "session_tat_p95_ms": [percentile(r["tat_ms"], 95) for r in results],
+        "finals": sum(r["finals"] for r in results),
+        "transcripts_per_s": transcripts / wall,
+        "cpu_percent": (cpu_seconds() - cpu_start) / wall * 100,
+        "rss_peak_mib": rss_peak,
+        "errors": sum(r["errors"] for r in results),
+        "audio_seconds": seconds * sessions,
+    }
+
+
+def print_level(r: dict, slo_ms: float):
+    flag = "❌" if r["tat_p95_ms"] > slo_ms or r["errors"] else "✅"
+    print(f"{flag} {r['sessions']:>4} sessions | TAT p50 {r['tat_p50_ms']:7.0f} p95 {r['tat_p95_ms']:7.0f} "
+          f"p99 {r['tat_p99_ms']:7.0f} ms | lag p95 {r['lag_p95_ms']:7.0f} ms | "
+          f"{r['transcripts_per_s']:6.1f} msg/s | CPU {r['cpu_percent']:6.1f}% | RSS {r['rss_peak_mib']:7.1f} MiB"
+          + (f" | {r['errors']} errors" if r["errors"] else ""))
+
+
+async def run(args) -> int:
+    audio = fixtures.speech_like(args.seconds)
+    chunks = fixtures.split_chunks(fixtures.encode_webm(audio), args.seconds, args.chunk_ms)
+    messages = fixtures.audio_chunk_messages(chunks)
+    chunk_seconds = args.seconds / len(chunks)
+
+    backend = StubASR(rtf=args.stub_rtf, capacity=args.stub_slots)
+    port = free_port()
+    server = start_server(backend, port)
+    url = f"ws://127.0.0.1:{port}/ws"
+    print(f"Load test: {args.seconds:.0f}s fixture, {len(chunks)} chunks/session, stub RTF {args.stub_rtf}, "
+          f"{args.stub_slots} slot(s), SLO p95 TAT {args.slo_ms:.0f} ms\n")
+
+    report, breach = [], None
+    try:
+        for sessions in args.levels:
+            result = await run_level(url, sessions, messages, chunk_seconds, args.seconds)
+            report.append(result)
+            print_level(result, args.slo_ms)
+            if breach is None and (result["tat_p95_ms"] > args.slo_ms or result["errors"]):
+                breach = sessions
+                if not args.keep_going:
+                    break
+    finally:
+        server.should_exit = True
+
+    if breach is None:
+        print(f"\n✅ SLO held up to {args.levels[-1]} concurrent sessions")
+    else:
+        print(f"\n❌ SLO breached at {breach} concurrent sessions")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"slo_ms": args.slo_ms, "breach_sessions": breach, "levels": report}, f, indent=2)
+        print(f"Results written to {args.json}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /ws load generator (stub inference)")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated concurrent session counts")
+    parser.add_argument("--seconds", type=float, default=15.0, help="audio streamed per session")
+    parser.add_argument("--chunk-ms", type=int, default=250, help="MediaRecorder timeslice")
+    parser.add_argument("--slo-ms", type=float, default=1500.0, help="p95 turnaround SLO")
+    parser.add_argument("--stub-rtf", type=float, default=0.1, help="simulated inference cost (x audio duration)")
+    parser.add_argument("--stub-slots", type=int, default=1, help="simulated model pool size")
+    parser.add_argument("--keep-going", action="store_true", help="run all levels even after a breach")
+    parser.add_argument("--json", default=None, help="write results to this file")
+    args = parser.parse_args()
+    args.levels = [int(x) for x in args.levels.split(",") if x]
+
+    logging.basicConfig(level=logging.WARNING)
+    if not fixtures.ffmpeg_available():
+        print("❌ ffmpeg is required (fixture encoding and the /ws decoder)")
+        return 1
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
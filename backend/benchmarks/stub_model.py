@@ -0,0 +1,82 @@
+"""
+Deterministic stand-in for `MedicalASR` (no weights, no network).
+
+Implements the scheduler backend interface (`transcribe_batch`, `capacity`) plus
+`is_ready`/`pool_stats`. "Words" are the voiced regions of the window, found with a
+frame-energy threshold, each named after its pitch; since they depend only on the
+audio content, consecutive overlapping passes agree and LocalAgreement commits them
+like it would with Whisper. Inference cost is simulated as `rtf` x audio duration:
+slept per window for a lone window, so a cancelled one (`request.cancelled`) stops
+early like Whisper's segment loop does, and once for the longest window of a batch,
+which (like `MedicalASR`'s batched pass) cannot be interrupted.
+"""
+import threading
+import time
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME = SAMPLE_RATE // 100  # 10 ms
+VOCABULARY = (
+    "patient", "reports", "mild", "chest", "pain", "since", "yesterday", "no",
+    "fever", "blood", "pressure", "normal", "prescribe", "ibuprofen", "follow", "up",
+)
+
+
+class StubASR:
+    def __init__(self, rtf: float = 0.05, capacity: int = 1, threshold_dbfs: float = -35.0):
+        self.rtf = rtf
+        self.capacity = max(1, capacity)
+        self.threshold = 10 ** (threshold_dbfs / 20)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self.calls = 0
+
+    def is_ready(self) -> bool:
+        return True
+
+    def pool_stats(self) -> dict:
+        return {"instances": 0, "slots": self.capacity, "stub_rtf": self.rtf}
+
+    def words(self, audio: np.ndarray) -> list:
+        """`(start, end, word)` tuples relative to the window start."""
+        n = len(audio) // FRAME
+        if n == 0:
+            return []
+        frames = np.asarray(audio[:n * FRAME], dtype=np.float32).reshape(n, FRAME)
+        voiced = np.sqrt(np.mean(frames * frames, axis=1)) > self.threshold
+
+        words = []
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+        for start, end in zip(edges[::2], edges[1::2]):
+            if end - start < 5 or end == n:  # too short, or still running at the window edge
+                continue
+            segment = frames[start:end].ravel()
+            crossings = np.count_nonzero(np.diff(np.signbit(segment)))
+            pitch = crossings * SAMPLE_RATE / (2 * len(segment))
+            words.append((start * FRAME / SAMPLE_RATE, end * FRAME / SAMPLE_RATE,
+                          VOCABULARY[int(pitch) // 8 % len(VOCABULARY)]))
+        return words
+
+    def transcribe_batch(self, requests: list) -> list:
+        with self._slots:
+            self.calls += 1
+            live = [r for r in requests if not (getattr(r, "cancelled", None) is not None and r.cancelled.is_set())]
+            if len(live) > 1:
+                if self.rtf > 0:
+                    time.sleep(self.rtf * max(len(r.audio) for r in live) / SAMPLE_RATE)
+                live_ids = {id(r) for r in live}
+                return [self._result(r) if id(r) in live_ids else None for r in requests]
+            results = []
+            for request in requests:
+                cancelled = getattr(request, "cancelled", None)
+                if cancelled is not None and cancelled.wait(self.rtf * len(request.audio) / SAMPLE_RATE):
+                    results.append(None)
+                    continue
+                if cancelled is None and self.rtf > 0:
+                    time.sleep(self.rtf * len(request.audio) / SAMPLE_RATE)
+                results.append(self._result(request))
+            return results
+
+    def _result(self, request):
+        words = self.words(request.audio)
+        return words if request.word_timestamps else " ".join(w[2] for w in words)
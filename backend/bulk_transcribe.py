@@ -0,0 +1,293 @@
+"""
+Offline transcription of recorded audio (`POST /api/transcribe`).
+
+The upload is streamed to a temporary file, decoded by ffmpeg into 16 kHz mono PCM
+block by block, and split on VAD boundaries: consecutive utterances are packed into
+chunks of at most `max_chunk_s` (Whisper's context is 30s) and silence never reaches
+the model. Chunks go through the shared `InferenceScheduler`, `parallel` at a time, so
+they are batched with each other; segments are yielded in file order as they complete.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import deque
+
+import numpy as np
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+import metrics
+from dsp import int16_to_float32
+from vad import StreamingVAD
+
+logger = logging.getLogger("asr-worker")
+
+SAMPLE_RATE = 16000
+BLOCK_SAMPLES = SAMPLE_RATE * 3 // 10  # 0.3s of PCM per read
+MULTIPART_OVERHEAD = 64 * 1024  # form fields and part headers allowed on top of the file
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes // (1024 * 1024)} MB")
+
+
+async def receive_upload(request: Request, max_bytes: int, executor) -> str:
+    """
+    Streams the request body (raw audio, or the `file` field of a multipart form) to a
+    temporary file and returns its path; disk writes run on `executor` (`AudioExecutor`).
+    The size cap is enforced as bytes arrive, so an oversized upload is cut off without
+    being buffered first. The caller deletes the file (see `UploadResultResponse`).
+    """
+    fd, path = tempfile.mkstemp(prefix="asr-upload-")
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if request.headers.get("content-type", "").startswith("multipart/form-data"):
+                written = await _receive_multipart(request, out, max_bytes, executor)
+            else:
+                async for data in request.stream():
+                    written += len(data)
+                    if written > max_bytes:
+                        raise _too_large(max_bytes)
+                    await executor.run(out.write, data)
+        if written == 0:
+            raise HTTPException(status_code=400, detail="Empty upload")
+        return path
+    except BaseException:
+        os.remove(path)
+        raise
+
+
+async def _receive_multipart(request: Request, out, max_bytes: int, executor) -> int:
+    """
+    Parses a multipart body incrementally and writes its `file` field to `out` as it
+    arrives (no spooling by Starlette's form parser). Returns the file's size.
+    """
+    _, params = parse_options_header(request.headers["content-type"])
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise HTTPException(status_code=400, detail="Multipart upload without a boundary")
+
+    part = {"headers": {}, "field": b"", "value": b"", "is_file": False}
+    found = []
+    data = []  # bytes of the `file` field parsed from the current body chunk
+
+    def on_part_begin():
+        part.update(headers={}, field=b"", value=b"", is_file=False)
+
+    def on_header_field(buf, start, end):
+        part["field"] += buf[start:end]
+
+    def on_header_value(buf, start, end):
+        part["value"] += buf[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part.update(field=b"", value=b"")
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["is_file"] = options.get(b"name") == b"file" and not found
+        if part["is_file"]:
+            found.append(True)
+
+    def on_part_data(buf, start, end):
+        if part["is_file"]:
+            data.append(bytes(buf[start:end]))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin, "on_header_field": on_header_field, "on_header_value": on_header_value,
+        "on_header_end": on_header_end, "on_headers_finished": on_headers_finished, "on_part_data": on_part_data,
+    })
+    received = written = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes + MULTIPART_OVERHEAD:
+            raise _too_large(max_bytes)
+        parser.write(chunk)
+        if data:
+            block = b"".join(data)
+            data.clear()
+            written += len(block)
+            if written > max_bytes:
+                raise _too_large(max_bytes)
+            await executor.run(out.write, block)
+    parser.finalize()
+    if not found:
+        raise HTTPException(status_code=400, detail="Multipart upload needs a 'file' field")
+    return written
+
+
+class UploadResultResponse(StreamingResponse):
+    """
+    NDJSON results of a bulk job. Deletes the uploaded file once the response is over,
+    however it ends: finished, failed, or the client gone before the first byte (when
+    the body generator never runs, so its own `finally` would not either).
+    """
+    def __init__(self, content, path: str):
+        super().__init__(content, media_type="application/x-ndjson")
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def decode_pcm_blocks(path: str, block_samples: int = BLOCK_SAMPLES):
+    """Yields the file as 16 kHz mono int16 blocks (any container/codec ffmpeg reads)."""
+    ffmpeg = shutil.which("ffmpeg") or "ffmpeg"
+    process = subprocess.Popen(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-i", path,
+         "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    try:
+        block_bytes = block_samples * 2
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) - len(data) % 2], dtype=np.int16)
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg could not decode the upload: {process.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def split_speech(blocks, max_chunk_s: float = 25.0, max_gap_s: float = 2.0, sample_rate: int = SAMPLE_RATE):
+    """
+    Groups VAD utterances into chunks: `(start_sample, int16 audio)`. A chunk closes at a
+    silence longer than `max_gap_s`, or before it would exceed `max_chunk_s` (at the last
+    utterance boundary inside it when there is one, else hard at the limit).
+    """
+    vad = StreamingVAD(sample_rate=sample_rate)
+    max_chunk = int(max_chunk_s * sample_rate)
+    max_gap = int(max_gap_s * sample_rate)
+    # An endpoint fires after the hangover; the utterance ended that long ago (plus a short tail)
+    endpoint_lag = vad.endpoint_frames * vad.frame_samples - vad.preroll_samples
+
+    held = deque()     # blocks covering audio from `held_start` on
+    held_start = 0
+    chunk_start = None  # absolute start of the open chunk
+    speech_end = None   # absolute end of the last finished utterance in it
+
+    def cut(end: int):
+        audio = np.concatenate(held)
+        return chunk_start, audio[chunk_start - held_start:end - held_start]
+
+    for block in blocks:
+        held.append(block)
+        endpoint = vad.process(block)
+        position = vad.samples_seen
+
+        if chunk_start is None and vad.in_speech:
+            chunk_start, speech_end = max(vad.speech_start, held_start), None
+        if chunk_start is not None:
+            if endpoint:
+                speech_end = max(chunk_start, position - endpoint_lag)
+            if not vad.in_speech and speech_end is not None and position - speech_end >= max_gap:
+                yield cut(speech_end)
+                chunk_start = None
+            elif position - chunk_start >= max_chunk:
+                end = speech_end if speech_end is not None else chunk_start + max_chunk
+                yield cut(end)
+                chunk_start = end if vad.in_speech else None
+                speech_end = None
+
+        # Drop whole blocks before the open chunk (or before a 1s lead-in for the next utterance)
+        keep_from = chunk_start if chunk_start is not None else position - sample_rate
+        while held and held_start + len(held[0]) <= keep_from:
+            held_start += len(held.popleft())
+
+    if chunk_start is not None:
+        end = vad.samples_seen if vad.in_speech or speech_end is None else speech_end
+        if end > chunk_start:
+            yield cut(end)
+
+
+async def _submit(scheduler, session_id: str, audio: np.ndarray, language: str, words: bool):
+    """Submits one chunk to the scheduler's bulk lane (behind live sessions, outside QoS)."""
+    return await scheduler.submit(session_id, audio, language, vad_filter=True, word_timestamps=words, bulk=True)
+
+
+async def transcribe_file(path: str, scheduler, executor, language: str = "en", words: bool = False,
+                          parallel: int = 4, max_chunk_s: float = 25.0, job_id: str = "bulk"):
+    """
+    Async generator of result dicts for the audio file at `path`: one `segment` per
+    chunk (seconds from the start of the file, in file order), then `done` (or `error`).
+    `parallel` chunks wait in the scheduler's bulk lane at once; decoding and VAD run on `executor`.
+    """
+    chunks = split_speech(decode_pcm_blocks(path), max_chunk_s=max_chunk_s)
+    pending = deque()  # (index, start sample, samples, task)
+    t_start = time.perf_counter()
+    speech_samples, index, exhausted = 0, 0, False
+    metrics.ACTIVE_SESSIONS.inc(path="bulk")
+    try:
+        while True:
+            while not exhausted and len(pending) < parallel:
+                item = await executor.run(next, chunks, None)
+                if item is None:
+                    exhausted = True
+                    break
+                start, pcm = item
+                audio = int16_to_float32(pcm)
+                task = asyncio.create_task(_submit(scheduler, job_id, audio, language, words))
+                pending.append((index, start, len(pcm), task))
+                speech_samples += len(pcm)
+                index += 1
+            if not pending:
+                break
+
+            i, start, n, task = pending.popleft()
+            result = await task
+            offset = start / SAMPLE_RATE
+            segment = {"type": "segment", "index": i, "start": round(offset, 2), "end": round(offset + n / SAMPLE_RATE, 2)}
+            if words:
+                result = result or []
+                segment["text"] = " ".join(w[2] for w in result)
+                segment["words"] = [{"start": round(offset + s, 2), "end": round(offset + e, 2), "word": w}
+                                    for s, e, w in result]
+            else:
+                segment["text"] = result or ""
+            metrics.TRANSCRIPTS_SENT.inc(path="bulk", kind="final")
+            yield segment
+
+        elapsed = time.perf_counter() - t_start
+        yield {
+            "type": "done",
+            "chunks": index,
+            "speech_s": round(speech_samples / SAMPLE_RATE, 2),
+            "elapsed_s": round(elapsed, 2),
+            "speech_rtf": round(elapsed / (speech_samples / SAMPLE_RATE), 3) if speech_samples else 0.0,
+        }
+        logger.info(f"[BULK] ✅ {job_id}: {index} chunk(s), {speech_samples / SAMPLE_RATE:.1f}s of speech "
+                    f"in {elapsed:.1f}s")
+    except Exception as e:
+        logger.error(f"[BULK] ❌ {job_id} failed: {e}")
+        yield {"type": "error", "message": str(e)}
+    finally:
+        metrics.ACTIVE_SESSIONS.dec(path="bulk")
+        for _, _, _, task in pending:
+            task.cancel()
+        try:
+            await executor.run(chunks.close)  # stops ffmpeg
+        except ValueError:
+            pass  # still running in the executor (client went away mid-read); finalized when collected
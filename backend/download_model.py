@@ -1,19 +1,57 @@
 """
-Pre-download Whisper model for faster first-time usage
+Pre-download the Whisper models for faster (and hub-free) startup.
+
+Fetches every configured model (MODEL_SIZE, its language routes and QoS tiers) into
+the pinned local directory ASR_MODEL_DIR with a checksum manifest, then loads each
+one with every configured compute type so a bad download fails here, not on a pod.
+
+    python download_model.py                          # what the .env configures
+    python download_model.py --models small,small.en --compute-types int8,float32
 """
-from faster_whisper import WhisperModel
-
-print("[DOWNLOAD] Downloading Whisper model (base)...")
-print("           This is a one-time download of ~140MB")
-print("           Model will be cached for future use\n")
-
-# Download the model - same configuration as used in main.py
-model = WhisperModel(
-    "base",
-    device="cpu",
-    compute_type="int8"
-)
-
-print("[SUCCESS] Model downloaded successfully!")
-print("          Model is cached and ready to use")
-print("\n[READY] Your app is ready to transcribe speech!")
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+import model_store
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Fetch the configured Whisper models into ASR_MODEL_DIR")
+    parser.add_argument("--models", help="comma-separated names (default: MODEL_SIZE + routes + QoS tiers)")
+    parser.add_argument("--compute-types", default=os.getenv("WHISPER_COMPUTE", "int8"),
+                        help="comma-separated compute types to test-load each model with")
+    parser.add_argument("--revision", default=os.getenv("ASR_MODEL_REVISION"), help="hub revision to pin")
+    parser.add_argument("--dir", default=model_store.model_dir())
+    args = parser.parse_args()
+
+    names = args.models.split(",") if args.models else model_store.configured_models()
+    compute_types = [c.strip() for c in args.compute_types.split(",") if c.strip()]
+    print(f"[DOWNLOAD] Fetching {', '.join(names)} into {args.dir}")
+    print("           Models are downloaded once and reused on every start\n")
+
+    from faster_whisper import WhisperModel
+    failed = []
+    for name in names:
+        try:
+            path = model_store.fetch(name, args.dir, args.revision)
+            for compute_type in compute_types:
+                WhisperModel(path, device=os.getenv("WHISPER_DEVICE", "cpu"), compute_type=compute_type)
+            print(f"[OK] {name} -> {path} ({', '.join(compute_types)})")
+        except Exception as e:
+            print(f"[FAIL] {name}: {e}")
+            failed.append(name)
+
+    if failed:
+        print(f"\n[ERROR] {len(failed)} model(s) failed: {', '.join(failed)}")
+        return 1
+    print("\n[SUCCESS] Models downloaded and verified!")
+    print(f"          Set ASR_MODEL_DIR={args.dir} (and ASR_MODEL_OFFLINE=1 to forbid hub lookups)")
+    print("\n[READY] Your app is ready to transcribe speech!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
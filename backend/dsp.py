@@ -0,0 +1,183 @@
+"""
+In-process audio DSP shared by the ingest paths: sample format conversion,
+downmix, polyphase resampling and level metering.
+
+Functions take an optional `out` array and write into it (callers keep one per
+session), so steady-state streaming does not allocate per frame beyond small
+index temporaries. The resampler is a windowed-sinc polyphase FIR, which unlike
+linear interpolation band-limits the signal before decimating. Measured at
+48k -> 16k: flat to 4 kHz (-0.5 dB at 5 kHz), transition band about 7-12 kHz
+(-14 dB at 8 kHz, -36 dB at 10 kHz), then at least -85 dB from 12 kHz up. So
+content just above 8 kHz still aliases into 6-8 kHz, attenuated by 15-35 dB.
+"""
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+INT16_SCALE = np.float32(1.0 / 32768.0)
+INT16_MAX = np.float32(32767.0)
+
+
+def int16_to_float32(samples: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """int16 PCM -> float32 in [-1, 1)."""
+    if out is None:
+        out = np.empty(len(samples), dtype=np.float32)
+    out = out[:len(samples)]
+    np.multiply(samples, INT16_SCALE, out=out)
+    return out
+
+
+def float32_to_int16(samples: np.ndarray, out: np.ndarray = None, scratch: np.ndarray = None) -> np.ndarray:
+    """float32 in [-1, 1] -> int16 (clipped); `scratch` is a float32 work array of at least the same length."""
+    n = len(samples)
+    if out is None:
+        out = np.empty(n, dtype=np.int16)
+    if scratch is None:
+        scratch = np.empty(n, dtype=np.float32)
+    out, scratch = out[:n], scratch[:n]
+    np.multiply(samples, INT16_MAX, out=scratch, casting="unsafe")
+    np.clip(scratch, -32768, 32767, out=scratch)
+    out[:] = scratch
+    return out
+
+
+def downmix(samples: np.ndarray, channels: int, out: np.ndarray = None) -> np.ndarray:
+    """Interleaved int16 or float32 frames -> float32 mono (channel average, int16 rescaled)."""
+    n = len(samples) // channels
+    if out is None:
+        out = np.empty(n, dtype=np.float32)
+    out = out[:n]
+    scale = np.float32((1.0 / 32768.0 if samples.dtype == np.int16 else 1.0) / channels)
+    if channels == 1:
+        np.multiply(samples[:n], scale, out=out)
+        return out
+    # Strided adds instead of `mean(axis=1)`, which is several times slower on short frames
+    np.add(samples[0:n * channels:channels], samples[1:n * channels:channels], out=out, dtype=np.float32)
+    for c in range(2, channels):
+        np.add(out, samples[c:n * channels:channels], out=out)
+    np.multiply(out, scale, out=out)
+    return out
+
+
+def level_dbfs(audio: np.ndarray) -> float:
+    """RMS level in dBFS of int16 or float32 audio (same scale as pydub's `dBFS`)."""
+    if audio.size == 0:
+        return float("-inf")
+    rms = math.sqrt(float(np.mean(np.square(audio, dtype=np.float64))))
+    if audio.dtype == np.int16:
+        rms /= 32768.0
+    return 20.0 * math.log10(rms) if rms > 0 else float("-inf")
+
+
+def peak_dbfs(audio: np.ndarray) -> float:
+    """Peak level in dBFS of int16 or float32 audio (pydub's `max_dBFS`)."""
+    if audio.size == 0:
+        return float("-inf")
+    peak = max(abs(float(audio.max())), abs(float(audio.min())))
+    if audio.dtype == np.int16:
+        peak /= 32768.0
+    return 20.0 * math.log10(peak) if peak > 0 else float("-inf")
+
+
+def design_filter(up: int, down: int, taps_per_phase: int = 32, beta: float = 8.0,
+                  rolloff: float = 0.9) -> np.ndarray:
+    """
+    Kaiser-windowed sinc low-pass for resampling by `up/down`, split into its polyphase
+    bank: `bank[p, k] = h[p + k * up]`, shape `(up, taps_per_phase)`.
+    """
+    n = taps_per_phase * up
+    cutoff = rolloff * 0.5 / max(up, down)  # cycles per sample at the upsampled rate
+    t = np.arange(n) - (n - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n, beta)
+    h *= up / h.sum()  # unity gain after zero-stuffing by `up`
+    return h.reshape(taps_per_phase, up).T.astype(np.float32)
+
+
+class PolyphaseResampler:
+    """
+    Streaming mono float32 resampler (e.g. 48k or 44.1k -> 16k). Keeps `taps - 1`
+    input samples of history between calls, so chunk boundaries are seamless.
+    Output lags the input by half the filter length (~0.3 ms at 48 kHz).
+    """
+    def __init__(self, rate_in: int, rate_out: int, taps_per_phase: int = 32):
+        g = math.gcd(rate_in, rate_out)
+        self.rate_in, self.rate_out = rate_in, rate_out
+        self.up, self.down = rate_out // g, rate_in // g
+        self.taps = taps_per_phase
+        self.passthrough = self.up == self.down
+        # Reversed taps: a window x[i - taps + 1 .. i] dotted with bank_rev[p] is the output at phase p
+        self.bank_rev = np.ascontiguousarray(design_filter(self.up, self.down, taps_per_phase)[:, ::-1])
+        self._allocate(taps_per_phase - 1 + 4096)
+        self._pos = (taps_per_phase - 1) * self.up  # next output, in 1/up input samples from _x[0]
+
+    def max_output(self, n_in: int) -> int:
+        return n_in * self.up // self.down + 2
+
+    def _allocate(self, n: int):
+        """(Re)allocates the input buffer (history + chunk), its window view and the output array."""
+        grown = np.zeros(n, dtype=np.float32)
+        if hasattr(self, "_x"):
+            grown[:self.taps - 1] = self._x[:self.taps - 1]
+        self._x = grown
+        self._windows = sliding_window_view(self._x, self.taps)  # zero-copy (n - taps + 1, taps)
+        self._out = np.zeros(self.max_output(n), dtype=np.float32)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Resamples the next chunk. The result is a view of an internal array, valid until
+        the next call.
+        """
+        if self.passthrough:
+            return samples
+        history = self.taps - 1
+        n_x = history + len(samples)
+        if n_x > len(self._x):
+            self._allocate(2 * n_x)
+        x = self._x[:n_x]
+        x[history:] = samples
+
+        n_out = max(0, -(-(n_x * self.up - self._pos) // self.down))
+        out = self._out[:n_out]
+        if n_out:
+            if self.up == 1:
+                # Integer decimation: every output uses the same taps, windows are strided
+                first = self._pos - history
+                np.dot(self._windows[first:first + n_out * self.down:self.down], self.bank_rev[0], out=out)
+            else:
+                t = self._pos + self.down * np.arange(n_out)
+                rows = self._windows[t // self.up - history]
+                np.einsum("nk,nk->n", rows, self.bank_rev[t % self.up], out=out)
+
+        # Carry the history and rebase the position onto the next chunk
+        self._pos += n_out * self.down - len(samples) * self.up
+        self._x[:history] = x[n_x - history:]
+        return out
+
+
+class PCMConverter:
+    """
+    Interleaved int16/float32 PCM at any rate and channel count -> mono int16 at
+    `rate_out`, through per-instance buffers that grow to the largest frame seen.
+    The result is valid until the next call.
+    """
+    def __init__(self, rate_in: int, channels: int = 1, rate_out: int = 16000):
+        self.channels = channels
+        self.resampler = PolyphaseResampler(rate_in, rate_out)
+        self._buffers = {}
+
+    def _buffer(self, name: str, n: int, dtype) -> np.ndarray:
+        buffer = self._buffers.get(name)
+        if buffer is None or len(buffer) < n:
+            buffer = self._buffers[name] = np.zeros(max(n, 2 * len(buffer) if buffer is not None else n), dtype=dtype)
+        return buffer
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if samples.dtype == np.int16 and self.channels == 1 and self.resampler.passthrough:
+            return samples
+        if self.channels > 1 or samples.dtype == np.int16:
+            samples = downmix(samples, self.channels, out=self._buffer("mono", len(samples) // self.channels, np.float32))
+        resampled = self.resampler.process(samples)
+        n = len(resampled)
+        return float32_to_int16(resampled, out=self._buffer("int16", n, np.int16),
+                                scratch=self._buffer("scratch", n, np.float32))
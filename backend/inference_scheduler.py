@@ -0,0 +1,356 @@
+"""
+Central inference scheduler.
+
+Every ingest path (WebSocket sessions, LiveKit agent tracks) submits its PCM windows
+here instead of calling the model from the default thread pool. The scheduler keeps
+a small queue per session, serves sessions round-robin, and groups windows from
+different sessions into one batched encoder/decoder pass on the backend. Offline work
+(bulk file transcription) goes through a separate lower-priority lane.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger("asr-worker")
+
+
+class SchedulerBusy(Exception):
+    """Raised by `submit` when admission control rejects a window (all slots busy, queue full)."""
+
+
+class InferenceRequest:
+    """One PCM window waiting for transcription."""
+    __slots__ = ("session_id", "audio", "language", "vad_filter", "prompt", "word_timestamps", "future", "enqueued_at",
+                 "cache_key", "model_tier", "bulk", "cancelled")
+
+    def __init__(self, session_id: str, audio: np.ndarray, language: str, vad_filter: bool,
+                 prompt: str, word_timestamps: bool, future: asyncio.Future, cache_key: bytes = None,
+                 model_tier: str = None, bulk: bool = False):
+        self.session_id = session_id
+        self.audio = audio
+        self.language = language
+        self.vad_filter = vad_filter
+        self.prompt = prompt
+        self.word_timestamps = word_timestamps
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+        self.cache_key = cache_key
+        self.model_tier = model_tier  # QoS override of the model size (None = configured model)
+        self.bulk = bulk
+        # Set once nobody wants the result; the backend checks it between segments and stops early
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class InferenceScheduler:
+    """
+    Queues per-session windows and dispatches cross-session batches to `backend`.
+
+    `backend` must provide `transcribe_batch(requests) -> list`, returning one result per
+    `InferenceRequest` (see `MedicalASR.transcribe_batch`), and may expose `capacity`:
+    the number of batches it can run in parallel (model pool slots).
+
+    Admission control: at most `capacity` batches are in flight; everything else waits
+    in the per-session queues (never in the executor). Once `max_queue_depth` windows
+    are waiting, new sessions' windows are rejected with `SchedulerBusy`.
+
+    With a `cache` (`TranscriptionCache`), bulk windows whose PCM and options were seen
+    before (a re-uploaded file, a retried job) are answered at submit time without
+    queueing. Live windows grow and carry a changing prompt, so they never repeat and
+    skip the lookup (and its clip, int16 copy and hash) entirely.
+
+    `model_tier` (set by the QoS controller) is stamped on every new window; `window_rtf`
+    tracks recent decode time relative to the longest window of each batch.
+
+    Bulk lane: `submit(..., bulk=True)` windows wait in one FIFO and are never superseded
+    or rejected. They take every free slot while no live window is waiting. Under steady
+    live load they age: once the lane has waited `bulk_max_wait_ms` (since its oldest
+    window arrived or its last batch finished), one bulk batch goes ahead of the live
+    queue, so bulk keeps at least one slot in turn and is never starved. Bulk windows are
+    left out of `queue_depth`, `live_in_flight` and `window_rtf` (what QoS reads) and
+    always use the configured model, so a large upload cannot push live sessions down a
+    model tier.
+
+    Cancellation: a window whose waiter goes away (task cancelled, `wait_for` timeout) or
+    that `cancel_session` revokes is skipped if still queued, or flagged (`cancelled`) if
+    running, so the backend stops between segments instead of finishing dead work.
+    """
+    def __init__(self, backend, max_batch_size: int = 4, max_pending_per_session: int = 1,
+                 batch_wait_ms: float = 10.0, max_queue_depth: int = 64, cache=None, bulk_max_wait_ms: float = 2000.0):
+        self.backend = backend
+        self.cache = cache
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_pending_per_session = max(1, max_pending_per_session)
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.bulk_max_wait = bulk_max_wait_ms / 1000.0
+        self.max_queue_depth = max(1, max_queue_depth)
+        self.max_concurrency = max(1, getattr(backend, "capacity", 1))
+        self.model_tier = None
+        self.window_rtf = 0.0
+
+        # session_id -> deque[InferenceRequest]; order of keys is the round-robin order
+        self.pending = OrderedDict()
+        self.bulk = deque()   # bulk lane, FIFO
+        self.running = set()  # InferenceRequests handed to the backend
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="asr-infer")
+        self.in_flight = 0
+        self.bulk_in_flight = 0
+        self._bulk_done_at = 0.0  # when the last bulk batch finished (aging restarts from there)
+        self._wakeup = None
+        self._task = None
+
+        # Stats
+        self.batches_run = 0
+        self.windows_run = 0
+        self.windows_dropped = 0
+        self.windows_rejected = 0
+        self.windows_cancelled = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Live windows waiting (the bulk lane is not counted)."""
+        return sum(len(q) for q in self.pending.values())
+
+    @property
+    def live_in_flight(self) -> int:
+        return self.in_flight - self.bulk_in_flight
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "sessions_waiting": len(self.pending),
+            "bulk_waiting": len(self.bulk),
+            "batches_in_flight": self.in_flight,
+            "bulk_batches_in_flight": self.bulk_in_flight,
+            "max_concurrency": self.max_concurrency,
+            "batches_run": self.batches_run,
+            "windows_run": self.windows_run,
+            "windows_dropped": self.windows_dropped,
+            "windows_rejected": self.windows_rejected,
+            "windows_cancelled": self.windows_cancelled,
+            "avg_batch_size": round(self.windows_run / self.batches_run, 2) if self.batches_run else 0.0,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch_loop())
+
+    async def submit(self, session_id: str, audio: np.ndarray, language: str = "en", vad_filter: bool = True,
+                     prompt: str = None, word_timestamps: bool = False, bulk: bool = False):
+        """
+        Queues a window and waits for its result: the transcript text, or a list of
+        `(start, end, word)` tuples when `word_timestamps` is set.
+        Returns None if the window was superseded by a newer one from the same session or
+        cancelled (`cancel_session`). Raises `SchedulerBusy` if the queue is full.
+        With `bulk`, the window goes to the bulk lane (see the class docstring).
+        """
+        model_tier = None if bulk else self.model_tier
+        cache_key = None
+        if bulk and self.cache is not None:
+            cache_key = self.cache.key(audio, language, vad_filter, prompt, word_timestamps, model_tier)
+            cached = self.cache.get(cache_key)
+            if cached is not self.cache.MISS:
+                return cached
+
+        self._ensure_started()
+        if bulk:
+            request = InferenceRequest(session_id, audio, language, vad_filter, prompt, word_timestamps,
+                                       asyncio.get_running_loop().create_future(), cache_key, bulk=True)
+            self.bulk.append(request)
+            self._wakeup.set()
+            return await self._wait(request)
+
+        queue = self.pending.get(session_id)
+        if not queue and self.queue_depth >= self.max_queue_depth:
+            # Sessions that already wait just replace their window; new ones are turned away
+            self.windows_rejected += 1
+            metrics.WINDOWS_REJECTED.inc()
+            raise SchedulerBusy(f"Inference queue full ({self.queue_depth} windows waiting)")
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self.pending.setdefault(session_id, deque())
+
+        # Per-session fairness: a session never holds more than N queued windows;
+        # the oldest is dropped since the newer window covers the same audio.
+        while len(queue) >= self.max_pending_per_session:
+            stale = queue.popleft()
+            self.windows_dropped += 1
+            metrics.WINDOWS_DROPPED.inc()
+            if not stale.future.done():
+                stale.future.set_result(None)
+
+        request = InferenceRequest(session_id, audio, language, vad_filter, prompt, word_timestamps, future, cache_key,
+                                   model_tier)
+        queue.append(request)
+        self._wakeup.set()
+        return await self._wait(request)
+
+    async def _wait(self, request: InferenceRequest):
+        try:
+            return await request.future
+        except asyncio.CancelledError:
+            # The waiter went away: stop the window wherever it is
+            self._cancel(request)
+            raise
+
+    def _cancel(self, request: InferenceRequest):
+        if request.cancelled.is_set():
+            return
+        request.cancel()
+        self.windows_cancelled += 1
+        metrics.WINDOWS_CANCELLED.inc(stage="running" if request in self.running else "queued")
+
+    def cancel_session(self, session_id: str) -> int:
+        """
+        Cancels the session's queued and running windows (their waiters get None).
+        Used when the output would be stale (superseded by an endpoint pass) or the
+        client disconnected. Returns how many windows were cancelled.
+        """
+        requests = list(self.pending.pop(session_id, ()))
+        requests += [r for r in self.bulk if r.session_id == session_id]
+        requests += [r for r in self.running if r.session_id == session_id]
+        requests = [r for r in requests if not r.future.done()]
+        for request in requests:
+            self._cancel(request)
+        return len(requests)
+
+    def _next_batch(self) -> list:
+        """
+        Takes at most one window per session, round-robin, up to `max_batch_size`
+        (the backend runs same-kind windows as one batched encoder/decoder pass).
+        Bulk windows go out when no live window is waiting, or ahead of it once aged.
+        """
+        if self._bulk_due():
+            batch = self._next_bulk_batch()
+            if batch:
+                return batch
+        batch = []
+        for session_id in list(self.pending.keys()):
+            if len(batch) >= self.max_batch_size:
+                break
+            queue = self.pending[session_id]
+            while queue and queue[0].future.done():  # waiter timed out / went away / cancelled
+                queue.popleft()
+            request = queue.popleft() if queue else None
+            if request is not None:
+                batch.append(request)
+            # Served (or empty) sessions move to the back of the rotation
+            self.pending.move_to_end(session_id)
+            if not queue:
+                del self.pending[session_id]
+        return batch
+
+    def _bulk_due(self) -> bool:
+        if not self.bulk:
+            return False
+        if not self.pending:
+            return True
+        if self.bulk_in_flight:
+            return False
+        waiting_since = max(self.bulk[0].enqueued_at, self._bulk_done_at)
+        return time.perf_counter() - waiting_since >= self.bulk_max_wait
+
+    def _next_bulk_batch(self) -> list:
+        """Oldest bulk windows, up to `max_batch_size`."""
+        batch = []
+        while self.bulk and len(batch) < self.max_batch_size:
+            request = self.bulk.popleft()
+            if not request.future.done():
+                batch.append(request)
+        return batch
+
+    def _has_work(self) -> bool:
+        return bool(self.pending) or bool(self.bulk)
+
+    async def _dispatch_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Give concurrent sessions a moment to join the batch
+            if self.batch_wait > 0:
+                await asyncio.sleep(self.batch_wait)
+
+            # Only hand work to the executor when a model slot is free
+            while self._has_work() and self.in_flight < self.max_concurrency:
+                batch = self._next_batch()
+                if not batch:
+                    continue
+                self.in_flight += 1
+                if batch[0].bulk:
+                    self.bulk_in_flight += 1
+                asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        loop = asyncio.get_running_loop()
+        t_start = time.perf_counter()
+        bulk = batch[0].bulk
+        if not bulk:
+            for request in batch:
+                metrics.QUEUE_WAIT_SECONDS.observe(t_start - request.enqueued_at)
+        self.running.update(batch)
+        try:
+            results = await loop.run_in_executor(self.executor, self.backend.transcribe_batch, batch)
+        except Exception as e:
+            logger.error(f"[SCHEDULER] Batch of {len(batch)} failed: {e}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        finally:
+            self.in_flight -= 1
+            if bulk:
+                self.bulk_in_flight -= 1
+                self._bulk_done_at = time.perf_counter()
+            self.running.difference_update(batch)
+            # A slot just freed up: let the dispatcher pick the next batch
+            if self._has_work():
+                self._wakeup.set()
+
+        elapsed = time.perf_counter() - t_start
+        audio_seconds = sum(len(request.audio) for request in batch) / 16000
+        metrics.INFERENCE_SECONDS.observe(elapsed, backend=type(self.backend).__name__)
+        metrics.BATCH_SIZE.observe(len(batch))
+        # Batches cut short by cancellation would understate the decode cost
+        if audio_seconds > 0 and not any(request.cancelled.is_set() for request in batch):
+            metrics.REAL_TIME_FACTOR.observe(elapsed / audio_seconds)
+            if not bulk:
+                longest = max(len(request.audio) for request in batch) / 16000
+                self.window_rtf = 0.7 * self.window_rtf + 0.3 * (elapsed / longest)
+
+        self.batches_run += 1
+        self.windows_run += len(batch)
+        for request, text in zip(batch, results):
+            if request.cancelled.is_set():
+                continue  # partial (or no) result, nobody waiting
+            if self.cache is not None and request.cache_key is not None:
+                self.cache.put(request.cache_key, text)
+            if not request.future.done():
+                request.future.set_result(text)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for queue in [*self.pending.values(), self.bulk]:
+            for request in queue:
+                if not request.future.done():
+                    request.future.cancel()
+        self.pending.clear()
+        self.bulk.clear()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,205 @@
+"""
+Process-pool inference backend (optional, `ASR_WORKER_PROCESSES > 0`).
+
+Each worker process holds its own `MedicalASR` (one WhisperModel instance), so
+ctranslate2 never competes with the event loop for the GIL and a model crash only
+takes down one worker, which is restarted. PCM windows are written into a
+per-worker `multiprocessing.shared_memory` block (no pickling of audio); only small
+metadata and the transcripts travel over a `Pipe`.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+logger = logging.getLogger("asr-worker")
+
+SAMPLE_RATE = 16000
+MAX_WINDOW_SECONDS = 30  # Whisper's context; longer windows keep their most recent 30s
+
+
+def _worker_main(conn, shm_name: str, worker_id: int, processes: int = 1):
+    """Worker process entry point: load the model, then serve batches until told to stop."""
+    os.environ["ASR_INSTANCES"] = "1"
+    os.environ["ASR_MODEL_COPIES"] = str(processes)  # autotuned threads are per process
+    os.environ["ASR_WORKER_PROCESSES"] = "0"
+    os.environ["LIVEKIT_MODE"] = "off"  # workers only run the model: skip the SDK import
+    if os.environ.get("ASR_AUTOTUNE") == "startup":
+        os.environ["ASR_AUTOTUNE"] = "cached"  # the parent already tuned
+    from main import MedicalASR
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        engine = MedicalASR()
+    except Exception as e:
+        conn.send(("error", f"model load failed: {e}"))
+        return
+    conn.send(("ready", worker_id))
+
+    while True:
+        try:
+            batch = conn.recv()
+        except EOFError:
+            break
+        if batch is None:
+            break
+
+        requests, audio = [], None
+        for meta in batch:
+            audio = np.ndarray((meta["length"],), dtype=np.float32, buffer=shm.buf, offset=meta["offset"])
+            requests.append(SimpleNamespace(audio=audio, cancelled=None, **meta["options"]))
+        try:
+            conn.send(("ok", engine.transcribe_batch(requests)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+        del requests, audio
+
+    shm.close()
+
+
+class _Worker:
+    """Parent-side handle: process, pipe and shared-memory block of one worker."""
+    def __init__(self, ctx, worker_id: int, shm_bytes: int, processes: int = 1):
+        self.ctx = ctx
+        self.worker_id = worker_id
+        self.processes = processes
+        self.shm = shared_memory.SharedMemory(create=True, size=shm_bytes)
+        self.audio = np.ndarray((shm_bytes // 4,), dtype=np.float32, buffer=self.shm.buf)
+        self.process = None
+        self.conn = None
+        self.ready = False
+
+    def start(self, timeout: float):
+        parent_conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_worker_main, args=(child_conn, self.shm.name, self.worker_id, self.processes),
+            name=f"asr-worker-{self.worker_id}", daemon=True,
+        )
+        self.process.start()
+        child_conn.close()  # so a dead worker shows up as EOF on our end
+        self.conn = parent_conn
+
+        if not self.conn.poll(timeout):
+            raise RuntimeError(f"worker {self.worker_id} did not become ready in {timeout:.0f}s")
+        try:
+            status, detail = self.conn.recv()
+        except EOFError:
+            raise RuntimeError(f"worker {self.worker_id} exited during startup (exit code {self.process.exitcode})")
+        if status != "ready":
+            raise RuntimeError(f"worker {self.worker_id}: {detail}")
+        self.ready = True
+
+    def stop(self):
+        self.ready = False
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        if self.process is not None:
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+
+    def close(self):
+        self.stop()
+        del self.audio
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessInferencePool:
+    """
+    `InferenceScheduler` backend that runs batches in worker processes.
+    `capacity` equals the number of workers, so the scheduler keeps one batch per worker in flight.
+    """
+    def __init__(self, processes: int, max_batch_size: int = 4, start_timeout: float = 300.0):
+        self.ctx = multiprocessing.get_context("spawn")
+        self.start_timeout = start_timeout
+        self.slot_samples = SAMPLE_RATE * MAX_WINDOW_SECONDS
+        shm_bytes = self.slot_samples * max(1, max_batch_size) * 4
+
+        self.workers = [_Worker(self.ctx, i, shm_bytes, max(1, processes)) for i in range(max(1, processes))]
+        self.idle = queue.Queue()
+        self.capacity = len(self.workers)
+        self.restarts = 0
+
+        logger.info(f"[WORKERS] Starting {self.capacity} inference worker process(es)...")
+        for worker in self.workers:
+            worker.start(self.start_timeout)
+            self.idle.put(worker)
+        logger.info(f"[WORKERS] {self.capacity} worker(s) ready.")
+
+    def is_ready(self) -> bool:
+        return all(w.ready and w.process.is_alive() for w in self.workers)
+
+    def pool_stats(self) -> dict:
+        return {
+            "worker_processes": self.capacity,
+            "idle_workers": self.idle.qsize(),
+            "alive_workers": sum(1 for w in self.workers if w.process.is_alive()),
+            "restarts": self.restarts,
+        }
+
+    def transcribe_batch(self, requests: list) -> list:
+        """
+        Blocking: runs one batch on an idle worker (called from the scheduler's executor).
+        Requests cancelled while waiting for a worker are not sent (result None); a batch
+        already in a worker runs to completion.
+        """
+        worker = self.idle.get()
+        try:
+            slots = len(worker.audio) // self.slot_samples
+            results = [None] * len(requests)
+            for start in range(0, len(requests), slots):
+                live = [i for i in range(start, min(start + slots, len(requests)))
+                        if not (requests[i].cancelled is not None and requests[i].cancelled.is_set())]
+                if live:
+                    for i, result in zip(live, self._run_on(worker, [requests[i] for i in live])):
+                        results[i] = result
+            return results
+        finally:
+            self.idle.put(worker)
+
+    def _run_on(self, worker: _Worker, requests: list) -> list:
+        batch = []
+        for i, request in enumerate(requests):
+            audio = request.audio[-self.slot_samples:]
+            offset = i * self.slot_samples
+            worker.audio[offset:offset + len(audio)] = audio
+            batch.append({
+                "offset": offset * 4,
+                "length": len(audio),
+                "options": {
+                    "language": request.language,
+                    "vad_filter": request.vad_filter,
+                    "prompt": request.prompt,
+                    "word_timestamps": request.word_timestamps,
+                    "model_tier": request.model_tier,
+                },
+            })
+        try:
+            worker.conn.send(batch)
+            status, result = worker.conn.recv()
+        except (EOFError, OSError):
+            self._restart(worker)
+            raise RuntimeError(f"inference worker {worker.worker_id} crashed; restarted")
+        if status != "ok":
+            raise RuntimeError(f"inference worker {worker.worker_id}: {result}")
+        return result
+
+    def _restart(self, worker: _Worker):
+        logger.error(f"[WORKERS] 💥 Worker {worker.worker_id} died, restarting...")
+        self.restarts += 1
+        worker.stop()
+        t_start = time.time()
+        worker.start(self.start_timeout)
+        logger.info(f"[WORKERS] Worker {worker.worker_id} restarted in {time.time() - t_start:.1f}s")
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
@@ -0,0 +1,92 @@
+"""
+Event-loop lag watchdog.
+
+A probe coroutine sleeps `interval` and records how late it wakes up (loop lag);
+a watcher thread notices when the probe has not run for longer than
+`stall_threshold` and samples the loop thread's stack at that moment, so the log
+names the code that is blocking the loop rather than only the victim. Lag
+percentiles and recent stalls are exposed through `stats()`.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger("asr-worker")
+
+# Event-loop machinery below the blocking call
+_SKIP_PATHS = (os.path.dirname(asyncio.__file__), os.path.join(os.path.dirname(threading.__file__), "selectors.py"))
+
+
+def _describe(frame) -> str:
+    """Innermost application frames of a stack (asyncio's own machinery skipped)."""
+    stack = [f for f in traceback.extract_stack(frame) if not f.filename.startswith(_SKIP_PATHS)]
+    return " <- ".join(f"{os.path.basename(f.filename)}:{f.lineno} {f.name}" for f in reversed(stack[-3:])) or "unknown"
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05, stall_threshold: float = 0.1, history: int = 1200):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.lags = deque(maxlen=history)   # recent lag samples (seconds); 60s at the default interval
+        self.stalls = deque(maxlen=20)      # recent stalls: duration and where the loop was stuck
+        self.stall_count = 0
+        self.max_lag = 0.0
+        self._beat = time.perf_counter()
+        self._culprit = None
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+
+    async def _probe(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._beat = now = time.perf_counter()
+            lag = max(0.0, now - t0 - self.interval)
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            metrics.EVENT_LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.stall_threshold:
+                where, self._culprit = self._culprit or "unknown (stalled between samples)", None
+                self.stall_count += 1
+                self.stalls.append({"at": round(time.time(), 3), "ms": round(lag * 1000), "where": where})
+                logger.warning(f"[LOOP] 🐢 Event loop blocked for {lag * 1000:.0f}ms in {where}")
+
+    def _watch(self):
+        """Watcher thread: samples the loop thread's stack while it is stuck."""
+        while not self._stop.wait(self.stall_threshold / 2):
+            if self._culprit is None and time.perf_counter() - self._beat > self.interval + self.stall_threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._culprit = _describe(frame)
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._task = asyncio.create_task(self._probe())
+        threading.Thread(target=self._watch, name="asr-loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        lags = np.asarray(self.lags) * 1000 if self.lags else np.zeros(1)
+        return {
+            "lag_p50_ms": round(float(np.percentile(lags, 50)), 2),
+            "lag_p95_ms": round(float(np.percentile(lags, 95)), 2),
+            "lag_p99_ms": round(float(np.percentile(lags, 99)), 2),
+            "lag_max_ms": round(self.max_lag * 1000, 2),
+            "stalls": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
@@ -1,13 +1,16 @@
+import time
+IMPORT_STARTED = time.perf_counter()  # start of the startup timing report
 import os
 import asyncio
 import json
 import logging
+import hmac
 import signal
 # Windows compat: SIGKILL doesn't exist, map to SIGTERM
 if not hasattr(signal, "SIGKILL"):
     signal.SIGKILL = signal.SIGTERM
 import threading
-import time
+import socket
 import io
 import base64
 from dotenv import load_dotenv
@@ -18,33 +21,44 @@ FFMPEG_PATH = r"C:\ffmpeg\ffmpeg-2026-01-14-git-6c878f8b82-full_build\bin"
 if os.path.exists(FFMPEG_PATH):
     os.environ["PATH"] += os.pathsep + FFMPEG_PATH
 
-# LiveKit & Signal Processing  
-try:
-    from livekit import api, agents, rtc
-    from livekit.agents import JobContext, WorkerOptions, cli
-    # from livekit.plugins import silero # Unused and causes import error
-    LIVEKIT_AVAILABLE = True
-except Exception as e:
-    print(f"⚠️ LiveKit DLL not available: {e}")
-    print("⚠️ Running in WebSocket-ONLY mode (Recommended for single-user apps)")
-    LIVEKIT_AVAILABLE = False
-
 import numpy as np
 
-# ASR
-from faster_whisper import WhisperModel
-
 # Web Server
-from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 import uvicorn
 import base64
 import shutil
 import tempfile
 import io
-from pydub import AudioSegment
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
+from types import SimpleNamespace
+
+# Audio Ingest
+import autotune
+import metrics
+from audio_decoder import StreamingWebMDecoder, RawPCMDecoder
+from dsp import PCMConverter, level_dbfs, peak_dbfs
+from inference_scheduler import InferenceScheduler, SchedulerBusy
+from inference_workers import ProcessInferencePool
+from transcription_cache import TranscriptionCache
+from agent_registry import AgentHandle, AgentRegistry
+from sharding import ClusterCoordinator, create_store
+import model_store
+from model_router import LoadedModel, ModelRouter, estimate_model_bytes, parse_routes
+from qos import QoSController, parse_tiers
+from backpressure import TrackBackpressure, check_strategy
+from bulk_transcribe import UploadResultResponse, receive_upload, transcribe_file
+from audio_executor import AudioExecutor
+from loop_monitor import LoopLagMonitor
+from startup_report import StartupReport
+from streaming import StreamingTranscriber
+from vad import StreamingVAD
+
+startup = StartupReport(IMPORT_STARTED)
+startup.record("imports", time.perf_counter() - IMPORT_STARTED)
 
 # Load env vars
 load_dotenv()
@@ -62,26 +76,199 @@ LIVEKIT_URL = os.getenv("LIVEKIT_URL")
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
 LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 API_PORT = int(os.getenv("API_PORT", 8000))
+# Seconds an agent waits in an empty room before leaving
+AGENT_JOIN_TIMEOUT = float(os.getenv("AGENT_JOIN_TIMEOUT", 10))
+# Agent backpressure: max audio per pass, and what happens to the backlog beyond it
+AGENT_MAX_WINDOW_S = float(os.getenv("AGENT_MAX_WINDOW_S", 8))
+# Rate the agent asks LiveKit for; anything but 16000 is resampled in-process (dsp.PCMConverter)
+AGENT_CAPTURE_RATE = int(os.getenv("AGENT_CAPTURE_RATE", 48000))
+AGENT_BACKPRESSURE = check_strategy(os.getenv("AGENT_BACKPRESSURE", "coalesce"))  # coalesce | drop_oldest | skip
 
-if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
-    if LIVEKIT_AVAILABLE:
-        logger.warning("⚠️ LiveKit credentials missing, but continuing in WebSocket-only mode")
+# --- Cluster (multi-node sharding) ---
+CLUSTER_STORE = os.getenv("CLUSTER_STORE", "memory")  # "memory" (single node) or "file:<shared dir>"
+CLUSTER_NODE_ID = os.getenv("CLUSTER_NODE_ID", f"{socket.gethostname()}:{API_PORT}")
+CLUSTER_ADVERTISE_URL = os.getenv("CLUSTER_ADVERTISE_URL", f"http://127.0.0.1:{API_PORT}")
+CLUSTER_SECRET = os.getenv("CLUSTER_SECRET", "")
+NODE_CAPACITY = int(os.getenv("NODE_CAPACITY", 32))  # sessions + agents before rooms spill to other nodes
+
+# "auto": LiveKit agent mode when credentials are configured; "on"/"off" force it.
+# The SDK (~0.5s of imports) is only loaded when the mode is enabled.
+LIVEKIT_MODE = os.getenv("LIVEKIT_MODE", "auto")
+LIVEKIT_AVAILABLE = False
+if LIVEKIT_MODE == "on" or (LIVEKIT_MODE == "auto" and all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET])):
+    with startup.phase("livekit_import"):
+        try:
+            from livekit import api, rtc
+            LIVEKIT_AVAILABLE = True
+        except Exception as e:
+            print(f"⚠️ LiveKit DLL not available: {e}")
+            print("⚠️ Running in WebSocket-ONLY mode (Recommended for single-user apps)")
+else:
     # Don't exit - WebSocket mode works without LiveKit
+    logger.info("LiveKit mode off (no credentials or LIVEKIT_MODE=off): WebSocket-only")
+
+# --- Inference Scheduling ---
+ASR_BATCH_SIZE = int(os.getenv("ASR_BATCH_SIZE", 4))
+ASR_BATCH_WAIT_MS = float(os.getenv("ASR_BATCH_WAIT_MS", 10))
+ASR_MAX_QUEUE = int(os.getenv("ASR_MAX_QUEUE", 64))
+# > 0: run inference in N worker processes (shared-memory audio) instead of in-process
+ASR_WORKER_PROCESSES = int(os.getenv("ASR_WORKER_PROCESSES", 0))
+# Memory budget of the transcription result cache (0 = disabled)
+ASR_CACHE_MB = float(os.getenv("ASR_CACHE_MB", 16))
+# Bulk file transcription: upload size limit and chunks in the scheduler at once per job
+ASR_UPLOAD_MAX_MB = float(os.getenv("ASR_UPLOAD_MAX_MB", 500))
+ASR_BULK_PARALLEL = int(os.getenv("ASR_BULK_PARALLEL", ASR_BATCH_SIZE))
+# Bulk work that has waited this long behind live sessions gets the next free slot
+ASR_BULK_MAX_WAIT_MS = float(os.getenv("ASR_BULK_MAX_WAIT_MS", 2000))
+# Blocking audio work (ffmpeg, decoding, DSP) runs on its own bounded thread pool
+ASR_AUDIO_THREADS = int(os.getenv("ASR_AUDIO_THREADS", min(4, os.cpu_count() or 1)))
+ASR_AUDIO_MAX_PENDING = int(os.getenv("ASR_AUDIO_MAX_PENDING", 64))
+# Event-loop stalls longer than this are logged with the blocking code location
+LOOP_STALL_MS = float(os.getenv("LOOP_STALL_MS", 100))
+# Load-adaptive degradation: "auto" (MODEL_SIZE + two smaller sizes), "off", or e.g. "small,base,tiny"
+ASR_QOS_TIERS = os.getenv("ASR_QOS_TIERS", "auto")
 
 # --- Global State & Lifespan ---
-asr_engine = None
+asr_engine = None  # MedicalASR (in-process) or ProcessInferencePool (worker processes)
+inference_scheduler = None
+qos_controller = None
+# Readiness state machine: loading -> warming -> ready (or failed)
+model_state = "loading"
+model_error = None
+model_settled = None  # asyncio.Event, set once the state is "ready" or "failed" (created in the lifespan)
+# A room's cluster assignment is released when its agent ends here
+agent_registry = AgentRegistry(on_finished=lambda room_name: cluster.release(room_name))
+audio_executor = AudioExecutor(ASR_AUDIO_THREADS, ASR_AUDIO_MAX_PENDING)
+loop_monitor = LoopLagMonitor(stall_threshold=LOOP_STALL_MS / 1000)
+
+def node_load() -> int:
+    """Open sessions (WebSocket + agent tracks) plus running agents on this node."""
+    return int(metrics.ACTIVE_SESSIONS.total()) + len(agent_registry)
+
+cluster = ClusterCoordinator(CLUSTER_NODE_ID, CLUSTER_ADVERTISE_URL, NODE_CAPACITY,
+                             create_store(CLUSTER_STORE), node_load)
+
+def load_inference_backend():
+    """Loads the configured inference backend (blocking: models are loaded here)."""
+    if ASR_WORKER_PROCESSES > 0:
+        # Tune once here; the workers then read the stored result instead of racing to tune
+        autotune.settings_for(os.getenv("MODEL_SIZE", "small"), os.getenv("WHISPER_DEVICE", "cpu"),
+                              copies=ASR_WORKER_PROCESSES)
+        return ProcessInferencePool(ASR_WORKER_PROCESSES, max_batch_size=ASR_BATCH_SIZE)
+    return MedicalASR()
+
+def warm_up_backend(engine):
+    """
+    Runs throwaway inferences so ctranslate2 allocates its buffers before the first
+    real session: one streaming (word timestamps) pass per pool slot, then one batch of
+    each kind (text, and word timestamps with alignment).
+    """
+    rng = np.random.default_rng(0)
+    audio = (0.01 * rng.standard_normal(16000 * 2)).astype(np.float32)  # 2s of low noise
+    word_request = SimpleNamespace(audio=audio, language="en", vad_filter=False, prompt=None, word_timestamps=True,
+                                   model_tier=None, cancelled=None)
+    # Pools hand out slots FIFO, so consecutive calls land on different instances/workers
+    for _ in range(getattr(engine, "capacity", 1)):
+        engine.transcribe_batch([word_request])
+    text_request = SimpleNamespace(audio=audio, language="en", vad_filter=False, prompt=None, word_timestamps=False,
+                                   model_tier=None, cancelled=None)
+    engine.transcribe_batch([text_request, text_request])
+    engine.transcribe_batch([word_request, word_request])
+
+async def prepare_inference():
+    """Loads and warms the model off the event loop, then opens the scheduler."""
+    global asr_engine, inference_scheduler, qos_controller, model_state, model_error
+    loop = asyncio.get_running_loop()
+    try:
+        if asr_engine is None:
+            model_state = "loading"
+            logger.info("[LIFESPAN] Loading Whisper model (in background)...")
+            t_start = time.time()
+            with startup.phase("model_load"):
+                asr_engine = await loop.run_in_executor(None, load_inference_backend)
+            logger.info(f"[LIFESPAN] Whisper model loaded in {time.time() - t_start:.1f}s.")
+
+        model_state = "warming"
+        t_start = time.time()
+        with startup.phase("warm_up"):
+            await loop.run_in_executor(None, warm_up_backend, asr_engine)
+        logger.info(f"[LIFESPAN] 🔥 Warm-up done in {time.time() - t_start:.1f}s.")
+
+        cache = TranscriptionCache(int(ASR_CACHE_MB * 1024 * 1024)) if ASR_CACHE_MB > 0 else None
+        inference_scheduler = InferenceScheduler(asr_engine, max_batch_size=ASR_BATCH_SIZE, batch_wait_ms=ASR_BATCH_WAIT_MS,
+                                                 max_queue_depth=ASR_MAX_QUEUE, cache=cache,
+                                                 bulk_max_wait_ms=ASR_BULK_MAX_WAIT_MS)
+        # Tiers step down from the loaded model; worker processes (own models) are not tiered
+        if isinstance(asr_engine, MedicalASR):
+            primary = asr_engine.router.primary.name
+            tiers = parse_tiers(ASR_QOS_TIERS, primary)
+        else:
+            tiers = [os.getenv("MODEL_SIZE", "small")]
+        qos_controller = QoSController(inference_scheduler, tiers)
+        qos_controller.start()
+        model_state = "ready"
+        logger.info(f"[LIFESPAN] ✅ Inference ready (batch size {ASR_BATCH_SIZE}).")
+        startup.ready()
+    except Exception as e:
+        model_state, model_error = "failed", str(e)
+        logger.error(f"[LIFESPAN] ❌ Model load failed: {e}")
+    finally:
+        model_settled.set()
+
+def model_ready() -> bool:
+    return model_state == "ready"
+
+def model_status() -> dict:
+    """WebSocket `status` message: clients hold off (or show a spinner) until `whisper_ready`."""
+    return {
+        "type": "status",
+        "whisper_ready": model_ready(),
+        "model_state": model_state,
+        "mode": "live"
+    }
+
+async def push_model_status(websocket: WebSocket):
+    """
+    Per-session task for clients that connected while the model was loading: sends the
+    second `status` (whisper_ready) as soon as loading settles, or an `error` and close
+    code 1011 if it failed, without waiting for the client to send audio first.
+    """
+    await model_settled.wait()
+    try:
+        if model_state == "failed":
+            await websocket.send_json({"type": "error", "message": f"Model failed to load: {model_error}"})
+            await websocket.close(code=1011)
+        else:
+            await websocket.send_json(model_status())
+    except Exception:
+        pass  # client already gone
+
+def get_scheduler() -> InferenceScheduler:
+    """Returns the shared scheduler (only valid once `model_ready()`)."""
+    if inference_scheduler is None:
+        raise RuntimeError(f"Inference not ready (model {model_state})")
+    return inference_scheduler
+
+metrics.Gauge("asr_inference_queue_depth", "Live windows waiting in the inference scheduler",
+              fn=lambda: inference_scheduler.queue_depth if inference_scheduler else 0)
+metrics.Gauge("asr_inference_bulk_queue_depth", "Bulk transcription windows waiting in the scheduler's bulk lane",
+              fn=lambda: len(inference_scheduler.bulk) if inference_scheduler else 0)
+metrics.Gauge("asr_model_ready", "1 once the model is loaded and warmed up",
+              fn=lambda: 1 if model_ready() else 0)
+metrics.Gauge("asr_audio_executor_pending", "Audio executor calls running or waiting for a slot",
+              fn=lambda: audio_executor.running + audio_executor.waiting)
+metrics.Gauge("asr_inference_batches_in_flight", "Batches currently running on the model pool",
+              fn=lambda: inference_scheduler.in_flight if inference_scheduler else 0)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 1. Startup: Load Model
-    global asr_engine
-    if asr_engine is None:
-        logger.info("[LIFESPAN] Loading Whisper model...")
-        try:
-            asr_engine = MedicalASR()
-            logger.info("[LIFESPAN] Whisper model ready.")
-        except Exception as e:
-            logger.error(f"[LIFESPAN] Model load failed: {e}")
+    # 1. Startup: Load + warm the model in the background (the server accepts clients meanwhile)
+    global model_settled
+    with startup.phase("lifespan_start"):
+        model_settled = asyncio.Event()
+        loop_monitor.start()
+        loader = asyncio.create_task(prepare_inference())
+        cluster.start()
 
     # 2. Startup: Launch Agent Background Task Handler
     # We no longer use agents.Worker(run) because custom LiveKit instances
@@ -92,6 +279,17 @@ async def lifespan(app: FastAPI):
     
     # 3. Shutdown
     logger.info("[LIFESPAN] Shutting down...")
+    loader.cancel()
+    await cluster.stop()
+    await agent_registry.stop_all()
+    if qos_controller is not None:
+        qos_controller.stop()
+    if inference_scheduler is not None:
+        await inference_scheduler.stop()
+    if isinstance(asr_engine, ProcessInferencePool):
+        asr_engine.close()
+    audio_executor.shutdown()
+    loop_monitor.stop()
     
 # --- FastAPI Setup (Token Server) ---
 app = FastAPI(title="LiveKit Voice Agent API", lifespan=lifespan)
@@ -125,27 +323,121 @@ async def create_token(req: TokenRequest):
             can_subscribe=True
         ))
     
-    # --- TRIGGER AGENT (Manual Spawn) ---
+    # --- TRIGGER AGENT (Manual Spawn, one per room, on the node that owns the room) ---
+    agent_node = None
     if req.room_name.startswith("agent-"):
-        logger.info(f"Triggering Agent for room: {req.room_name}")
-        asyncio.create_task(spawn_agent(req.room_name))
+        node = cluster.assign(req.room_name)  # sticky: later tokens for the room reach the same node
+        agent_node = node["node_id"]
+        if cluster.is_local(node) or not await request_remote_agent(node, req.room_name):
+            if not cluster.is_local(node):
+                cluster.reassign(req.room_name, cluster.node_id)
+            agent_node = cluster.node_id
+            start_local_agent(req.room_name)
 
     return {
         "token": token.to_jwt(),
-        "livekit_url": LIVEKIT_URL
+        "livekit_url": LIVEKIT_URL,
+        "agent_node": agent_node
     }
 
+def start_local_agent(room_name: str) -> bool:
+    if agent_registry.spawn(room_name, spawn_agent):
+        logger.info(f"Triggering Agent for room: {room_name}")
+        return True
+    logger.info(f"[AGENT] Agent already running in {room_name}, reusing it")
+    return False
+
+async def request_remote_agent(node: dict, room_name: str) -> bool:
+    """Asks the owning node to run the room's agent. False if it could not be reached."""
+    if not CLUSTER_SECRET:
+        logger.warning(f"[CLUSTER] CLUSTER_SECRET not set, running agent for {room_name} locally")
+        return False
+    import aiohttp
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=3)) as session:
+            async with session.post(f"{node['url']}/api/internal/agents", json={"room_name": room_name},
+                                    headers={"X-Cluster-Secret": CLUSTER_SECRET}) as resp:
+                resp.raise_for_status()
+        logger.info(f"[CLUSTER] Agent for {room_name} routed to {node['node_id']}")
+        return True
+    except Exception as e:
+        logger.warning(f"[CLUSTER] Node {node['node_id']} unreachable ({e}), running agent for {room_name} locally")
+        return False
+
+class AgentSpawnRequest(BaseModel):
+    room_name: str
+
+@app.post("/api/internal/agents")
+async def spawn_routed_agent(req: AgentSpawnRequest, x_cluster_secret: str = Header(default="")):
+    """Node-to-node: start (or reuse) the agent for a room this node owns."""
+    # Without a configured secret the internal API is closed, never open to anyone
+    if not CLUSTER_SECRET:
+        raise HTTPException(status_code=403, detail="Internal cluster API disabled (CLUSTER_SECRET not set)")
+    if not hmac.compare_digest(x_cluster_secret.encode(), CLUSTER_SECRET.encode()):
+        raise HTTPException(status_code=403, detail="Invalid cluster secret")
+    if not LIVEKIT_AVAILABLE:
+        raise HTTPException(status_code=503, detail="LiveKit unavailable on this node")
+    if not req.room_name.startswith("agent-"):
+        raise HTTPException(status_code=400, detail="Not an agent room")
+    return {"spawned": start_local_agent(req.room_name), "node_id": cluster.node_id}
+
+@app.get("/api/cluster")
+async def cluster_status():
+    return cluster.stats()
+
+@app.get("/api/route/{key}")
+async def route_key(key: str):
+    """Node that owns `key` (room name or session id); load balancers/clients can connect there."""
+    node = cluster.owner(key)
+    ws_url = node["url"].replace("http://", "ws://").replace("https://", "wss://")
+    return {"node_id": node["node_id"], "url": node["url"], "ws_url": f"{ws_url}/ws"}
+
 @app.get("/api/health")
 async def health():
-    # Robust check: Global engine exists AND model attribute is populated
-    is_whisper_ready = asr_engine is not None and getattr(asr_engine, "model", None) is not None
+    # Ready = loaded AND warmed up (and the engine still reports healthy)
+    is_whisper_ready = model_ready() and asr_engine.is_ready()
     return {
         "status": "ok", 
         "livekit_available": LIVEKIT_AVAILABLE, 
         "websocket_mode": True,
-        "whisper_loaded": is_whisper_ready
+        "whisper_loaded": is_whisper_ready,
+        "model_state": model_state,
+        "model_error": model_error,
+        "startup": startup.stats(),
+        "inference": inference_scheduler.stats() if inference_scheduler else None,
+        "model_pool": asr_engine.pool_stats() if is_whisper_ready else None,
+        "qos": qos_controller.stats() if qos_controller else None,
+        "agents": agent_registry.stats(),
+        "audio_executor": audio_executor.stats(),
+        "event_loop": loop_monitor.stats()
     }
 
+@app.post("/api/transcribe")
+async def transcribe_upload(request: Request, language: str = "en", words: bool = False):
+    """
+    Transcribes a recorded file (raw body or multipart `file`; any format ffmpeg reads).
+    Streams NDJSON: one `segment` per speech chunk (`start`/`end` in seconds, in file
+    order; per-word timings with `words=true`), then `done` with throughput stats.
+    """
+    if not model_ready():
+        raise HTTPException(status_code=503, detail=f"Model not ready ({model_state})")
+    path = await receive_upload(request, int(ASR_UPLOAD_MAX_MB * 1024 * 1024), audio_executor)
+    job_id = f"bulk-{int(time.time() * 1000)}-{id(request) % 10000}"
+    logger.info(f"[BULK] 📼 {job_id}: received {os.path.getsize(path) / 1024 / 1024:.1f} MB ({language})")
+
+    async def ndjson():
+        async for result in transcribe_file(path, get_scheduler(), audio_executor, language=language, words=words,
+                                            parallel=ASR_BULK_PARALLEL, job_id=job_id):
+            yield json.dumps(result) + "\n"
+
+    # The response deletes the upload when it ends, whether or not the generator ever ran
+    return UploadResultResponse(ndjson(), path)
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 class MicStatus(BaseModel):
     status: str
     mode: str
@@ -202,6 +494,123 @@ async def serve_spa(full_path: str):
     
     return {"status": "Frontend not found (dev mode)"}
 
+def feed_base64(decoder: StreamingWebMDecoder, audio_base64: str):
+    """Decodes one base64 WebM chunk and pushes it into ffmpeg (audio executor)."""
+    decoder.feed(base64.b64decode(audio_base64))
+
+def next_stream_step(stream: StreamingTranscriber, vad: StreamingVAD, processing_task, path: str,
+                     session_id: str = None) -> str:
+    """
+    VAD gate shared by all ingest paths. Returns "final" at a speech endpoint,
+    "partial" while speech is active, or None (busy, or silence: no model call).
+    At an endpoint, a partial pass of `session_id` still waiting for inference is
+    cancelled: the final pass covers its audio, so its result would only be superseded.
+    Passes are launched as tasks named `<session_id>:<step>`.
+    """
+    if processing_task is not None and not processing_task.done():
+        if not (vad.endpoint_pending and processing_task.get_name() == f"{session_id}:partial"
+                and get_scheduler().cancel_session(session_id)):
+            return None
+        logger.info(f"[{path.upper()}] ✂️ Endpoint preempted the in-flight partial pass of {session_id}")
+    if qos_controller is not None:
+        stream.max_buffer_seconds = qos_controller.window_seconds  # shorter windows under load
+    if vad.endpoint_pending:
+        vad.endpoint_pending = False
+        return "final"
+    if vad.in_speech:
+        return "partial"
+    # Silence: keep only the pre-roll so the next utterance starts with a short lead-in
+    stream.skip_silence(vad.samples_seen - vad.preroll_samples)
+    metrics.WINDOWS_SKIPPED_SILENT.inc(path=path)
+    return None
+
+async def transcribe_ws_window(websocket: WebSocket, session_id: str, stream: StreamingTranscriber, lang: str,
+                               final: bool = False, path: str = "ws"):
+    """
+    Runs one streaming pass over the session's uncommitted audio and sends the newly
+    committed text as a final transcript plus the unstable tail as a partial.
+    At a speech endpoint (`final`), everything still pending is committed.
+    Shared by the `/ws` (WebM) and `/ws/pcm` (raw PCM) endpoints.
+    """
+    t_start = time.time()
+    
+    try:
+        audio = stream.buffer
+        end = stream.ring.total_written  # window end: audio arriving during inference belongs to the next pass
+        logger.info(f"[MODE: WEBSOCKET] 🔊 Input Level: {level_dbfs(audio):.2f} dBFS, peak {peak_dbfs(audio):.2f} dBFS "
+                    f"({'endpoint' if final else 'speech'})")
+        
+        committed, partial = "", ""
+        if len(audio):
+            # Run Inference (uncommitted tail is queued on the shared scheduler)
+            logger.info(f"[AOI] 🧠 Inference queued (Using Loaded Model)")
+            try:
+                words = await get_scheduler().submit(
+                    session_id, audio, lang, prompt=stream.prompt(), word_timestamps=True
+                )
+            except SchedulerBusy as e:
+                # Admission control: skip this pass, the audio stays in the stream buffer
+                logger.warning(f"[MODE: WEBSOCKET] ⏳ Deferred: {e}")
+                return
+            except RuntimeError as e:
+                if "shutdown" in str(e).lower():
+                    return  # Silently ignore shutdown errors
+                raise
+            if words is None: return
+            committed, partial = stream.apply(words)
+        if final:
+            # Speech endpoint: whatever is still pending becomes final
+            committed = f"{committed} {stream.finalize(end)}".strip()
+            partial = ""
+        
+        committed = filter_hallucinations(committed)
+        tat = int((time.time() - t_start) * 1000)
+        metrics.TURNAROUND_SECONDS.observe(tat / 1000, path=path)
+        try:
+            if committed:
+                logger.info(f"[MODE: WEBSOCKET] 📤 Transcript: '{committed}' ({tat}ms)")
+                await websocket.send_json({
+                    "type": "transcript",
+                    "text": committed,
+                    "timestamp": int(time.time() * 1000), # Send Absolute Server Epoch
+                    "isFinal": True,
+                    "turnaround_ms": tat,
+                    "id": f"chunk-{int(time.time()*1000)}"
+                })
+                metrics.TRANSCRIPTS_SENT.inc(path=path, kind="final")
+            if partial and partial != stream.partial_sent:
+                await websocket.send_json({
+                    "type": "transcript",
+                    "text": partial,
+                    "timestamp": int(time.time() * 1000),
+                    "isFinal": False,
+                    "turnaround_ms": tat,
+                    "id": f"partial-{session_id}"
+                })
+                metrics.TRANSCRIPTS_SENT.inc(path=path, kind="partial")
+            stream.partial_sent = partial
+        except:
+            pass # Socket might be closed
+    except RuntimeError as e:
+        if "shutdown" not in str(e).lower():
+            logger.error(f"Task Error: {e}")
+    except Exception as e:
+        logger.error(f"Task Error: {e}")
+
+async def open_webm_decoder() -> StreamingWebMDecoder:
+    """Starts a session's ffmpeg decoder on the audio threads.
+
+    If the handler is cancelled while ffmpeg is starting, the decoder is killed as soon as it exists
+    instead of being left running with no owner.
+    """
+    opening = asyncio.ensure_future(audio_executor.run(StreamingWebMDecoder))
+    try:
+        return await asyncio.shield(opening)
+    except asyncio.CancelledError:
+        opening.add_done_callback(lambda f: f.cancelled() or f.exception() or f.result().kill())
+        raise
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """
@@ -211,107 +620,56 @@ async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     logger.info("🔌 [MODE: WEBSOCKET-DIRECT] Client connected - Ready for transcription")
     
-    # Initialize ASR engine and session buffer
-    global asr_engine
-    if not asr_engine:
-        asr_engine = MedicalASR()
-    
-    # Buffer to accumulate WebM chunks (must keep the header at the start)
-    header_buffer = bytearray()
-    session_audio_buffer = bytearray()
-    processing_task = None 
-    
-    # Send status to client
-    await websocket.send_json({
-        "type": "status",
-        "whisper_ready": True,
-        "mode": "live"
-    })    
+    session_id = f"ws-{id(websocket)}"
+    # Set up inside the try: a client that drops during setup must not leak ffmpeg or the gauges
+    decoder = None
+    status_task = None
+    buffer_bytes = None
     try:
+        # Per-session streaming decoder: each WebM chunk is decoded exactly once
+        # (starting ffmpeg, feeding it and stopping it all happen on the audio executor)
+        decoder = await open_webm_decoder()
+        stream = StreamingTranscriber()
+        vad = StreamingVAD()
+        last_decoded = 0
+        processing_task = None 
+        buffer_bytes = decoder.ring.nbytes + stream.ring.nbytes
+        metrics.ACTIVE_SESSIONS.inc(path="ws")
+        metrics.BUFFER_BYTES.inc(buffer_bytes)
+        
+        # Send status to client (if the model is still loading, a second status follows once ready)
+        await websocket.send_json(model_status())
+        status_task = None if model_ready() else asyncio.create_task(push_model_status(websocket))
         while True:
             data = await websocket.receive_json()
             
             if data.get("type") == "audio_chunk":
                 try:
-                    audio_base64 = data.get("data", "")
-                    audio_bytes = base64.b64decode(audio_base64)
-                    
-                    # Capture header on first chunk
-                    if not header_buffer:
-                        header_buffer = audio_bytes[:4096] # Capture first 4KB (WebM Header)
+                    with metrics.DECODE_SECONDS.time(path="ws"):
+                        # Push into the session decoder (header + clusters form one stream)
+                        await audio_executor.run(feed_base64, decoder, data.get("data", ""))
                     
-                    # Accumulate bytes
-                    session_audio_buffer.extend(audio_bytes)
-
-                    # 🛡️ Truncate Buffer: Keep only last 8s
-                    # We prepend the header to the tail so decoders still work
-                    if len(session_audio_buffer) > 256 * 1024:
-                         session_audio_buffer = session_audio_buffer[-(256 * 1024):]
-                    
-                    if processing_task is None or processing_task.done():
-                        # Construct a valid WebM snippet by prepending the original header
-                        buffer_copy = header_buffer + session_audio_buffer
-                        lang = data.get("language", "en")
-                        timestamp = data.get("timestamp", 0)
+                    # Move newly decoded PCM into the uncommitted stream buffer and the VAD
+                    new_audio, decoded = decoder.read_from(last_decoded)
+                    if decoded > last_decoded:
+                        stream.insert_audio(new_audio)
+                        vad.process(new_audio)
+                        last_decoded = decoded
                         
-                        async def task_wrapper(buf, l, ts):
-                            loop = asyncio.get_running_loop()
-                            t_start = time.time()
-                            
-                            try:
-                                # Prepare WAV in memory
-                                audio = AudioSegment.from_file(io.BytesIO(buf), format="webm")
-                                # Use last 5s
-                                if len(audio) > 5000: audio = audio[-5000:]
-                                
-                                logger.info(f"[MODE: WEBSOCKET] 🔊 Input Level: {audio.dBFS:.2f} dBFS")
-                                if audio.dBFS < -50: return
-                                
-                                audio = audio.set_channels(1).set_frame_rate(16000)
-                                wav_io = io.BytesIO()
-                                audio.export(wav_io, format="wav")
-                                wav_io.seek(0)
-                                
-                                # Run Inference
-                                def run_transcription():
-                                    logger.info(f"[AOI] 🧠 Inference started (Using Loaded Model)")
-                                    segments, _ = asr_engine.model.transcribe(
-                                        wav_io, beam_size=1, language=l, vad_filter=True,
-                                        vad_parameters=dict(min_speech_duration_ms=250),
-                                        no_speech_threshold=0.6
-                                    )
-                                    text = " ".join([s.text for s in segments]).strip()
-                                    return asr_engine.filter_hallucinations(text)
-                                
-                                try:
-                                    transcribed_text = await loop.run_in_executor(None, run_transcription)
-                                except RuntimeError as e:
-                                    if "shutdown" in str(e).lower():
-                                        return  # Silently ignore shutdown errors
-                                    raise
-                                
-                                if transcribed_text:
-                                    t_end = time.time()
-                                    tat = int((t_end - t_start) * 1000)
-                                    logger.info(f"[MODE: WEBSOCKET] 📤 Transcript: '{transcribed_text}' ({tat}ms)")
-                                    try:
-                                        await websocket.send_json({
-                                            "type": "transcript",
-                                            "text": transcribed_text,
-                                            "timestamp": int(time.time() * 1000), # Send Absolute Server Epoch
-                                            "isFinal": True,
-                                            "turnaround_ms": tat,
-                                            "id": f"chunk-{int(time.time()*1000)}"
-                                        })
-                                    except:
-                                        pass # Socket might be closed
-                            except RuntimeError as e:
-                                if "shutdown" not in str(e).lower():
-                                    logger.error(f"Task Error: {e}")
-                            except Exception as e:
-                                logger.error(f"Task Error: {e}")
-
-                        processing_task = asyncio.create_task(task_wrapper(buffer_copy, lang, timestamp))
+                        # Model still loading/warming: keep buffering (status_task tells the client once it settles)
+                        if model_state == "failed":
+                            await status_task  # error + close
+                            break
+                        if not model_ready():
+                            continue
+                        
+                        step = next_stream_step(stream, vad, processing_task, "ws", session_id)
+                        if step:
+                            lang = data.get("language", "en")
+                            processing_task = asyncio.create_task(
+                                transcribe_ws_window(websocket, session_id, stream, lang, final=(step == "final")),
+                                name=f"{session_id}:{step}",
+                            )
 
                 except Exception as e:
                     logger.error(f"❌ Error processing audio chunk: {e}")
@@ -321,10 +679,144 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"💥 WebSocket error: {e}")
         await websocket.close()
+    finally:
+        if status_task is not None and not status_task.done():
+            status_task.cancel()
+        # Nobody will read this session's transcripts: stop its queued/running inference
+        if inference_scheduler is not None:
+            inference_scheduler.cancel_session(session_id)
+        if buffer_bytes is not None:
+            metrics.ACTIVE_SESSIONS.dec(path="ws")
+            metrics.BUFFER_BYTES.dec(buffer_bytes)
+        if decoder is not None:
+            try:
+                await audio_executor.run(decoder.close)
+            except asyncio.CancelledError:
+                decoder.kill()  # handler cancelled (shutdown): stop ffmpeg without waiting for it
+                raise
+
+@app.websocket("/ws/pcm")
+async def websocket_pcm_endpoint(websocket: WebSocket):
+    """
+    Binary WebSocket endpoint for clients that can capture raw PCM.
+    Protocol:
+      1. Text handshake: {"type": "config", "sample_rate": 48000, "encoding": "s16le" | "f32le",
+         "channels": 1, "language": "en"}
+      2. Binary frames of interleaved PCM (no base64, no JSON, no ffmpeg).
+      3. Optional text {"type": "config", "language": ...} messages to switch language.
+    Returns the same `transcript` messages as `/ws`.
+    """
+    await websocket.accept()
+    logger.info("🔌 [MODE: WEBSOCKET-PCM] Client connected - Awaiting handshake")
+    
+    session_id = f"ws-pcm-{id(websocket)}"
+    
+    # 1. Handshake
+    try:
+        config = await websocket.receive_json()
+        if config.get("type") != "config":
+            raise ValueError("First message must be a 'config' handshake")
+        decoder = await audio_executor.run(
+            RawPCMDecoder,
+            input_rate=int(config.get("sample_rate", 16000)),
+            encoding=config.get("encoding", "s16le"),
+            channels=int(config.get("channels", 1)),
+        )
+        lang = config.get("language", "en")
+    except WebSocketDisconnect:
+        logger.info("👋 WebSocket PCM client disconnected during handshake")
+        return
+    except Exception as e:
+        logger.error(f"❌ [MODE: WEBSOCKET-PCM] Invalid handshake: {e}")
+        await websocket.send_json({"type": "error", "message": f"Invalid handshake: {e}"})
+        await websocket.close(code=1003)
+        return
+    
+    logger.info(f"[MODE: WEBSOCKET-PCM] Handshake OK ({decoder.input_rate} Hz, {config.get('encoding', 's16le')}, lang={lang})")
+    status_task = None
+    buffer_bytes = None
+    try:
+        stream = StreamingTranscriber()
+        vad = StreamingVAD()
+        last_decoded = 0
+        processing_task = None
+        buffer_bytes = decoder.ring.nbytes + stream.ring.nbytes
+        metrics.ACTIVE_SESSIONS.inc(path="ws_pcm")
+        metrics.BUFFER_BYTES.inc(buffer_bytes)
+        
+        await websocket.send_json(model_status())
+        status_task = None if model_ready() else asyncio.create_task(push_model_status(websocket))
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            
+            if message.get("bytes") is not None:
+                with metrics.DECODE_SECONDS.time(path="ws_pcm"):
+                    await audio_executor.run(decoder.feed, message["bytes"])
+            elif message.get("text"):
+                try:
+                    msg = json.loads(message["text"])
+                    if msg.get("type") == "config" and "language" in msg:
+                        lang = msg["language"]
+                        logger.info(f"[MODE: WEBSOCKET-PCM] Language set to '{lang}'")
+                except ValueError:
+                    logger.warning("[MODE: WEBSOCKET-PCM] Ignoring malformed text message")
+                continue
+            
+            new_audio, decoded = decoder.read_from(last_decoded)
+            if decoded > last_decoded:
+                stream.insert_audio(new_audio)
+                vad.process(new_audio)
+                last_decoded = decoded
+                
+                if model_state == "failed":
+                    await status_task  # error + close
+                    break
+                if not model_ready():
+                    continue
+                
+                step = next_stream_step(stream, vad, processing_task, "ws_pcm", session_id)
+                if step:
+                    processing_task = asyncio.create_task(
+                        transcribe_ws_window(websocket, session_id, stream, lang, final=(step == "final"), path="ws_pcm"),
+                        name=f"{session_id}:{step}",
+                    )
+    
+    except WebSocketDisconnect:
+        logger.info("👋 WebSocket PCM client disconnected")
+    except Exception as e:
+        logger.error(f"💥 WebSocket PCM error: {e}")
+        await websocket.close()
+    finally:
+        if status_task is not None and not status_task.done():
+            status_task.cancel()
+        if inference_scheduler is not None:
+            inference_scheduler.cancel_session(session_id)
+        decoder.close()
+        if buffer_bytes is not None:
+            metrics.ACTIVE_SESSIONS.dec(path="ws_pcm")
+            metrics.BUFFER_BYTES.dec(buffer_bytes)
 
 
 # --- ASR Worker Logic ---
 
+# Hallucination Blocklist (Common subtitle artifacts)
+HALLUCINATIONS = {
+    "Thank you.", "Thanks for watching.", "You", 
+    "MBC", "Amara.org", "Subtitles by", "Subtitles",
+    "Copyright", "©"
+}
+
+def filter_hallucinations(text: str) -> str:
+    if not text: return ""
+    if text.strip() in HALLUCINATIONS:
+        return ""
+    # If text starts with "Thank you" and is very short, ignore
+    if text.strip().startswith("Thank you") and len(text) < 15:
+        return ""
+    return text
+
 class MedicalASR:
     """
     Manages the faster-whisper model and VAD for transcription
@@ -333,66 +825,296 @@ class MedicalASR:
         # Allow configuration via Env (e.g. 'medium' for Server, 'tiny' for fast CPU)
         model_size = os.getenv("MODEL_SIZE", "small")
         device = os.getenv("WHISPER_DEVICE", "cpu")
-        compute_type = os.getenv("WHISPER_COMPUTE", "int8")
+        from faster_whisper import WhisperModel  # only needed where the model runs in this process
 
-        logger.info(f"Loading Whisper ({model_size}) model on {device}...")
-        try:
-            self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
-        except Exception as e:
-            logger.warning(f"Failed to load '{model_size}' model: {e}")
-            logger.warning("Falling back to 'base' (CPU/int8)")
-            self.model = WhisperModel("base", device="cpu", compute_type="int8")
+        # Measured per-host settings (ASR_AUTOTUNE=cached|startup); explicitly set variables still win
+        # (tuned per copy: the threads of all copies on this host fit the cores)
+        tuned = autotune.settings_for(model_size, device, copies=int(os.getenv("ASR_MODEL_COPIES", 0)) or
+                                      autotune.configured_copies())
+        compute_type = os.getenv("WHISPER_COMPUTE") or tuned.get("compute_type", "int8")
+        # Pool sizing: e.g. a 32-core box -> ASR_INSTANCES=4, ASR_CPU_THREADS=8
+        instances = max(1, int(os.getenv("ASR_INSTANCES", 1)))
+        cpu_threads = int(os.getenv("ASR_CPU_THREADS") or tuned.get("cpu_threads", 0))   # 0 = ctranslate2 default
+        num_workers = max(1, int(os.getenv("ASR_NUM_WORKERS") or tuned.get("num_workers", 1)))
+
+        logger.info(f"Loading Whisper ({model_size}) model on {device} "
+                    f"({instances} instance(s), compute_type={compute_type}, cpu_threads={cpu_threads or 'default'}, "
+                    f"num_workers={num_workers}{', autotuned' if tuned else ''})...")
+        # Verified local copy (download_model.py) instead of a hub lookup on every start
+        with startup.phase("model_verify"):
+            model_path = model_store.resolve(model_size)
+        self.models = []
+        for _ in range(instances):
+            try:
+                model = WhisperModel(model_path, device=device, compute_type=compute_type,
+                                     cpu_threads=cpu_threads, num_workers=num_workers)
+            except Exception as e:
+                logger.warning(f"Failed to load '{model_size}' model: {e}")
+                logger.warning("Falling back to 'base' (CPU/int8)")
+                model_size, device, compute_type = "base", "cpu", "int8"
+                model_path = model_store.resolve("base")
+                model = WhisperModel(model_path, device="cpu", compute_type="int8",
+                                     cpu_threads=cpu_threads, num_workers=num_workers)
+            self.models.append(model)
+        self.model = self.models[0]
+        self.load_options = dict(device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=num_workers)
+
+        # Checkout pool: every instance is available `num_workers` times, since
+        # ctranslate2 runs that many concurrent calls on one instance in parallel
+        primary = LoadedModel(model_size, self.models, num_workers,
+                              estimate_model_bytes(model_size, compute_type) * instances)
+        self.pool = primary.pool
+        self.capacity = primary.slots
+
+        # Language routing: e.g. English -> '<size>.en', loaded lazily into a RAM-bounded LRU
+        routes = parse_routes(os.getenv("ASR_LANGUAGE_MODELS", "auto"), model_size)
+        ram_budget = int(float(os.getenv("ASR_MODEL_RAM_MB", 4096)) * 1024 * 1024)
+        self.router = ModelRouter(primary, routes, self._load_variant, ram_budget,
+                                  lambda name: estimate_model_bytes(name, compute_type) * instances)
              
-        logger.info(f"Whisper model loaded.")
+        logger.info(f"Whisper model loaded ({self.capacity} inference slot(s), language routes: {routes or 'none'}).")
         
         # Hallucination Blocklist (Common subtitle artifacts)
-        self.HALLUCINATIONS = {
-            "Thank you.", "Thanks for watching.", "You", 
-            "MBC", "Amara.org", "Subtitles by", "Subtitles",
-            "Copyright", "©"
-        }
+        self.HALLUCINATIONS = HALLUCINATIONS
     
     def filter_hallucinations(self, text: str) -> str:
-        if not text: return ""
-        if text.strip() in self.HALLUCINATIONS:
-            return ""
-        # If text starts with "Thank you" and is very short, ignore
-        if text.strip().startswith("Thank you") and len(text) < 15:
-            return ""
-        return text
+        return filter_hallucinations(text)
+
+    def is_ready(self) -> bool:
+        return self.model is not None
         
+    def checkout(self, timeout: float = None, language: str = None, loaded: LoadedModel = None, tier: str = None):
+        """Borrows an instance of the language's (or QoS tier's) model from its pool for one inference call."""
+        return self.router.checkout(language, timeout=timeout, loaded=loaded, tier=tier)
+
+    def _load_variant(self, name: str) -> LoadedModel:
+        """Loads (and warms) a routed model with the primary's settings; runs on a background thread."""
+        from faster_whisper import WhisperModel
+        logger.info(f"[MODELS] Loading '{name}' for language routing...")
+        path = model_store.resolve(name)
+        models = [WhisperModel(path, **self.load_options) for _ in range(len(self.models))]
+        noise = (0.01 * np.random.default_rng(0).standard_normal(16000)).astype(np.float32)
+        for model in models:
+            list(model.transcribe(noise, beam_size=1, language="en", vad_filter=False)[0])
+        return LoadedModel(name, models, self.load_options["num_workers"], self.router.estimate_fn(name))
+
+    def pool_stats(self) -> dict:
+        return {"instances": len(self.models), "slots": self.capacity, "idle_slots": self.pool.qsize(),
+                "routing": self.router.stats()}
+
+    def transcribe_window(self, audio: np.ndarray, language: str = "en", vad_filter: bool = True,
+                          model_tier: str = None, cancelled: threading.Event = None) -> str:
+        """
+        Single "PCM window -> transcript" path shared by WebSocket and LiveKit modes.
+        Expects 16 kHz mono audio; it is handed to Whisper as a contiguous float32
+        array (no WAV encode/decode round-trip) and the result is hallucination-filtered.
+        Once `cancelled` is set, decoding stops at the next segment and None is returned.
+        """
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        options = dict(beam_size=1, language=language, vad_filter=vad_filter)
+        if vad_filter:
+            options.update(
+                vad_parameters=dict(min_speech_duration_ms=250),
+                no_speech_threshold=0.6
+            )
+        with self.checkout(language=language, tier=model_tier) as model:
+            # Segments are decoded lazily, one 30s context at a time: stop between them when cancelled
+            segments, _ = model.transcribe(audio, **options)
+            texts = []
+            for segment in segments:
+                if cancelled is not None and cancelled.is_set():
+                    return None
+                texts.append(segment.text)
+            text = " ".join(texts).strip()
+        return self.filter_hallucinations(text)
+
+    def transcribe_words(self, audio: np.ndarray, language: str = "en", vad_filter: bool = True, prompt: str = None,
+                         model_tier: str = None, cancelled: threading.Event = None) -> list:
+        """
+        Word-level pass used by streaming sessions: returns `(start, end, word)` tuples
+        (seconds relative to the window start) with the committed text as prompt, or
+        None when `cancelled` is set before decoding finishes.
+        """
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        options = dict(beam_size=1, language=language, vad_filter=vad_filter, word_timestamps=True,
+                       initial_prompt=prompt or None, condition_on_previous_text=False)
+        if vad_filter:
+            options.update(
+                vad_parameters=dict(min_speech_duration_ms=250),
+                no_speech_threshold=0.6
+            )
+        with self.checkout(language=language, tier=model_tier) as model:
+            # Segments are generated lazily: consume them while the model is checked out
+            segments, _ = model.transcribe(audio, **options)
+            words = []
+            for segment in segments:
+                if cancelled is not None and cancelled.is_set():
+                    return None
+                for word in segment.words or []:
+                    words.append((word.start, word.end, word.word.strip()))
+        return words
+
+    def transcribe_batch(self, requests: list) -> list:
+        """
+        Transcribes the scheduler's requests. Windows of the same kind are batched into
+        one encoder + decoder pass across sessions; they are padded to Whisper's 30s
+        context and silence is rejected through the decoder's no-speech probability
+        instead of Whisper's per-call VAD. Word-timestamp (streaming) windows are then
+        aligned in one batched call as well. A window alone in its group, or a
+        word-timestamp window longer than one context, runs through the regular
+        per-window path.
+        Requests cancelled meanwhile (`request.cancelled`) are skipped, or stopped between
+        segments, and get None.
+        """
+        results = [None] * len(requests)
+        n_samples = self.model.feature_extractor.n_samples
+
+        # One batched pass per routed model (e.g. English windows on '.en', the rest multilingual;
+        # under QoS pressure, the tier's smaller model). Word-timestamp windows are aligned
+        # against one start sequence, so they are grouped per language as well.
+        groups = {}
+        for i, request in enumerate(requests):
+            if request.cancelled is not None and request.cancelled.is_set():
+                continue
+            if request.word_timestamps and len(request.audio) > n_samples:
+                results[i] = self.transcribe_words(request.audio, request.language, request.vad_filter, request.prompt,
+                                                   request.model_tier, request.cancelled)
+                continue
+            loaded = self.router.route(request.language, request.model_tier)
+            key = (loaded.name, request.language, True) if request.word_timestamps else (loaded.name, None, False)
+            groups.setdefault(key, (loaded, []))[1].append(i)
+        for loaded, indices in groups.values():
+            if len(indices) == 1:
+                request = requests[indices[0]]
+                if request.word_timestamps:
+                    results[indices[0]] = self.transcribe_words(request.audio, request.language, request.vad_filter,
+                                                                request.prompt, request.model_tier, request.cancelled)
+                else:
+                    results[indices[0]] = self.transcribe_window(request.audio, request.language,
+                                                                 vad_filter=request.vad_filter,
+                                                                 model_tier=request.model_tier,
+                                                                 cancelled=request.cancelled)
+                continue
+            # One generate call cannot be interrupted: drop what was cancelled while earlier groups ran
+            indices = [i for i in indices if not (requests[i].cancelled is not None and requests[i].cancelled.is_set())]
+            if not indices:
+                continue
+            texts = self._generate_batch([requests[i] for i in indices], loaded)
+            for i, text in zip(indices, texts):
+                results[i] = text
+        return results
+
+    def _generate_batch(self, requests: list, loaded: LoadedModel = None) -> list:
+        """
+        One batched pass over windows of the same kind: texts, or (for word-timestamp
+        windows, all in one language) `(start, end, word)` lists.
+        """
+        from faster_whisper.audio import pad_or_trim
+        from faster_whisper.tokenizer import Tokenizer
+
+        with self.checkout(loaded=loaded) as model:
+            extractor = model.feature_extractor
+            n_samples = extractor.n_samples
+            features = np.stack([
+                pad_or_trim(extractor(np.ascontiguousarray(r.audio[-n_samples:], dtype=np.float32)), extractor.nb_max_frames)
+                for r in requests
+            ])
+            prompts = []
+            for r in requests:
+                tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=r.language)
+                previous = tokenizer.encode(" " + r.prompt.strip()) if r.prompt else []
+                prompts.append((tokenizer, model.get_prompt(tokenizer, previous, without_timestamps=True)))
+
+            encoder_output = model.encode(features)
+            results = model.model.generate(
+                encoder_output,
+                [prompt for _, prompt in prompts],
+                beam_size=1,
+                max_length=model.max_length,
+                return_no_speech_prob=True,
+                suppress_blank=True,
+                suppress_tokens=[-1],
+            )
+            if requests[0].word_timestamps:
+                return self._align_words(model, prompts[0][0], requests, features, encoder_output, results)
+
+        texts = []
+        for (tokenizer, _), result in zip(prompts, results):
+            if result.no_speech_prob > 0.6:
+                texts.append("")
+                continue
+            text = tokenizer.decode(result.sequences_ids[0]).strip()
+            texts.append(self.filter_hallucinations(text))
+        return texts
+
+    def _align_words(self, model, tokenizer, requests: list, features: np.ndarray, encoder_output, results) -> list:
+        """
+        Word timings for a batch of same-language windows from one batched cross-attention
+        alignment (what `transcribe(word_timestamps=True)` does per window).
+        """
+        from faster_whisper.transcribe import merge_punctuations
+
+        words = [[] for _ in requests]
+        tokens = [[t for t in result.sequences_ids[0] if t < tokenizer.eot] for result in results]
+        rows = [i for i, result in enumerate(results) if result.no_speech_prob <= 0.6 and tokens[i]]
+        if not rows:
+            return words
+        if len(rows) < len(requests):
+            encoder_output = model.encode(features[rows])  # align needs one non-empty row per encoded window
+        hop = model.feature_extractor.hop_length
+        alignments = model.model.align(
+            encoder_output,
+            tokenizer.sot_sequence,
+            [tokens[i] for i in rows],
+            [min(len(requests[i].audio), model.feature_extractor.n_samples) // hop for i in rows],
+        )
+        for i, alignment in zip(rows, alignments):
+            text_indices = np.array([pair[0] for pair in alignment.alignments])
+            time_indices = np.array([pair[1] for pair in alignment.alignments])
+            row_words, word_tokens = tokenizer.split_to_word_tokens(tokens[i] + [tokenizer.eot])
+            if len(word_tokens) <= 1:
+                continue
+            boundaries = np.pad(np.cumsum([len(t) for t in word_tokens[:-1]]), (1, 0))
+            jumps = np.pad(np.diff(text_indices), (1, 0), constant_values=1).astype(bool)
+            jump_times = time_indices[jumps] / model.tokens_per_second
+            timed = [dict(word=word, tokens=toks, start=start, end=end)
+                     for word, toks, start, end in zip(row_words, word_tokens,
+                                                       jump_times[boundaries[:-1]], jump_times[boundaries[1:]])]
+            merge_punctuations(timed, "\"'“¿([{-", "\"'.。,，!！?？:：”)]}、")
+            words[i] = [(float(w["start"]), float(w["end"]), w["word"].strip()) for w in timed if w["word"].strip()]
+        return words
+
     async def transcribe_buffer(self, audio_data: np.ndarray, sample_rate: int):
         """
         Transcribes raw float32 audio data.
         """
-        # Convert to text using faster-whisper
-        # faster-whisper expects float32 array
-        segments, _ = self.model.transcribe(
-            audio_data, 
-            beam_size=1, 
-            language="en",
-            vad_filter=True
-        )
-        
-        full_text = " ".join([s.text for s in segments]).strip()
-        return full_text
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.transcribe_window, audio_data, "en")
 
 # Global ASR instance is initialized in the lifespan
 # asr_engine = MedicalASR()
 
-async def spawn_agent(room_name: str):
+async def spawn_agent(agent: AgentHandle):
     """
     Directly joins a room as a participant to act as an agent.
     This bypasses the LiveKit Job system for guaranteed connection.
+    Started through `agent_registry` (one agent per room); leaves the room when the
+    last participant disconnects, nobody joins within AGENT_JOIN_TIMEOUT, or on shutdown.
     """
+    room_name = agent.room_name
     room = rtc.Room()
+    participant_joined = asyncio.Event()
+
+    def remote_humans():
+        return [p for p in room.remote_participants.values() if p.identity != "Agent-AI"]
     
     @room.on("track_subscribed")
     def on_track_subscribed(track, publication, participant):
         if track.kind == rtc.TrackKind.KIND_AUDIO:
              if participant.identity == "Agent-AI": return
-             logger.info(f"[AGENT] Processing audio track {track.sid} from {participant.identity}")
-             asyncio.create_task(process_audio_track(room, track, participant, participant_configs))
+             if agent.add_track_task((participant.identity, track.sid),
+                                     process_audio_track(room, track, participant, participant_configs, agent)):
+                 logger.info(f"[AGENT] Processing audio track {track.sid} from {participant.identity}")
 
     @room.on("track_published")
     def on_track_published(publication, participant):
@@ -400,6 +1122,23 @@ async def spawn_agent(room_name: str):
             if participant.identity == "Agent-AI": return
             publication.set_subscribed(True)
 
+    @room.on("participant_connected")
+    def on_participant_connected(participant):
+        if participant.identity != "Agent-AI":
+            participant_joined.set()
+
+    @room.on("participant_disconnected")
+    def on_participant_disconnected(participant):
+        agent.cancel_tracks(participant.identity)
+        participant_configs.pop(participant.identity, None)
+        if not remote_humans():
+            logger.info(f"[AGENT] Last participant left room: {room_name}")
+            agent.shutdown.set()
+
+    @room.on("disconnected")
+    def on_disconnected(*args):
+        agent.shutdown.set()
+
     # Store settings per participant (e.g. language)
     participant_configs = {}
 
@@ -416,6 +1155,7 @@ async def spawn_agent(room_name: str):
             except Exception as e:
                 logger.error(f"[AGENT] Error processing config: {e}")
 
+    joined = False
     try:
         # Generate Agent Token
         token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET) \
@@ -426,119 +1166,199 @@ async def spawn_agent(room_name: str):
             
         await room.connect(LIVEKIT_URL, token)
         logger.info(f"[AGENT] Successfully joined room: {room_name}")
+        joined = True
+        metrics.ACTIVE_AGENTS.inc()
         
         # Subscribe to existing tracks
-        for participant in room.remote_participants.values():
-            if participant.identity == "Agent-AI": continue # Don't subscribe to self
+        for participant in remote_humans():
+            participant_joined.set()
             for publication in participant.track_publications.values():
                 if publication.kind == rtc.TrackKind.KIND_AUDIO:
                     publication.set_subscribed(True)
 
-        # KEEP ALIVE LOOP: Stay in room as long as there is at least one remote participant
-        # (Wait 10s initially to allow user to connect)
-        await asyncio.sleep(10)
-        while len(room.remote_participants) > 0:
-            await asyncio.sleep(5)
+        # Give the user time to connect, then stay until the room empties (event-driven, no polling)
+        try:
+            await asyncio.wait_for(participant_joined.wait(), timeout=AGENT_JOIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.info(f"[AGENT] Nobody joined {room_name} within {AGENT_JOIN_TIMEOUT:.0f}s")
+            agent.shutdown.set()
+        await agent.shutdown.wait()
             
-        logger.info(f"[AGENT] Participant left, cleaning up room: {room_name}")
-        await room.disconnect()
+        logger.info(f"[AGENT] Cleaning up room: {room_name}")
 
     except Exception as e:
         logger.error(f"[AGENT] Room {room_name} error: {e}")
+    finally:
+        agent.cancel_tracks()
+        if joined:
+            metrics.ACTIVE_AGENTS.dec()
+            try:
+                await room.disconnect()
+            except Exception:
+                pass
 
-async def process_audio_track(room: rtc.Room, track, participant, participant_configs):
+async def process_audio_track(room: "rtc.Room", track, participant, participant_configs, agent: AgentHandle = None):
     """
     Reads audio frames from the track, buffers them, and runs ASR.
+    Passes are capped at AGENT_MAX_WINDOW_S; the backlog beyond that is handled by the
+    AGENT_BACKPRESSURE strategy, and the participant's lag is reported on `agent`.
     """
-    # Create an audio stream (yielding AudioFrames)
-    # Force 16kHz for Whisper compatibility
-    audio_stream = rtc.AudioStream(track, sample_rate=16000)
-    
-    # We will accumulate audio data (PCM 16kHz mono)
-    audio_buffer = bytearray()
+    # Create an audio stream (yielding AudioFrames) at WebRTC's native rate and
+    # resample to 16kHz for Whisper in-process (polyphase, measurable in the benchmarks)
+    audio_stream = rtc.AudioStream(track, sample_rate=AGENT_CAPTURE_RATE, num_channels=1)
+    converter = PCMConverter(AGENT_CAPTURE_RATE, channels=1, rate_out=16000)
     
     # Configuration
     SAMPLE_RATE = 16000
-    BYTES_PER_SAMPLE = 2 # int16
     BUFFER_SECONDS = 0.6 # Reduced from 1.0s to 0.6s for near-realtime TAT
-    BUFFER_SIZE_BYTES = int(SAMPLE_RATE * BYTES_PER_SAMPLE * BUFFER_SECONDS)
+    BUFFER_SIZE_SAMPLES = int(SAMPLE_RATE * BUFFER_SECONDS)
     
+    session_id = f"agent-{room.name}-{participant.identity}"
     logger.info(f"[MODE: LIVEKIT-AGENT] 🎧 Started processing audio for {participant.identity}")
     
+    # Streaming state: committed text + uncommitted audio (PCM 16kHz mono ring buffer)
+    stream = StreamingTranscriber()
+    vad = StreamingVAD()
+    backpressure = TrackBackpressure(stream, AGENT_BACKPRESSURE, AGENT_MAX_WINDOW_S)
+    if agent is not None:
+        agent.participants[participant.identity] = backpressure
+    buffer_bytes = stream.ring.nbytes
+    metrics.ACTIVE_SESSIONS.inc(path="agent")
+    metrics.BUFFER_BYTES.inc(buffer_bytes)
+    
+    async def publish(text, is_final, turnaround_ms):
+        payload = json.dumps({
+            "type": "transcript",
+            "text": text,
+            "isFinal": is_final,
+            "participantId": participant.identity,
+            "timestamp": int(time.time() * 1000),
+            "turnaround_ms": turnaround_ms,
+            "id": f"chunk-{int(time.time()*1000)}" if is_final else f"partial-{session_id}"
+        })
+        await room.local_participant.publish_data(payload, topic="transcription", reliable=True)
+        metrics.TRANSCRIPTS_SENT.inc(path="agent", kind="final" if is_final else "partial")
+    
     # helper for non-blocking processing
-    async def process_step(audio_data, lang_code):
-        check_peak = np.abs(audio_data).max()
+    async def process_step(lang_code, audio_data, end, final=False, capped=False, carried=""):
         # Debugging: Log every analysis attempt to trace "missing" audio
-        logger.info(f"[AGENT] 🔍 Analysing audio chunk (Peak: {check_peak:.4f})")
+        logger.info(f"[AGENT] 🔍 Analysing {len(audio_data) / SAMPLE_RATE:.2f}s of speech ({'endpoint' if final else 'partial'}, "
+                    f"lag {backpressure.lag:.1f}s)")
         
-        if check_peak < 0.001: return # Increased sensitivity
-
         process_start = time.time()
-        loop = asyncio.get_running_loop()
+        carried_merged = False
         
-        def do_transcribe(data, lang):
-            segments, _ = asr_engine.model.transcribe(
-                 data, beam_size=1, language=lang, 
-                 # Disable VAD to prevent hanging on silence
-                 vad_filter=False
-            )
-            text = " ".join([seg.text for seg in segments]).strip()
-            return asr_engine.filter_hallucinations(text)
-
         try:
-            # SAFETY: Timeout after 5.0s (Models can take time to warm up)
-            full_transcription = await asyncio.wait_for(
-                loop.run_in_executor(None, do_transcribe, audio_data, lang_code), 
-                timeout=5.0
-            )
-            if full_transcription:
-                turnaround_ms = int((time.time() - process_start) * 1000)
-                payload = json.dumps({
-                    "type": "transcript",
-                    "text": full_transcription,
-                    "isFinal": True,
-                    "participantId": participant.identity,
-                    "timestamp": int(time.time() * 1000),
-                    "turnaround_ms": turnaround_ms
-                })
-                await room.local_participant.publish_data(payload, topic="transcription", reliable=True)
-                
-                logger.info(f"[AGENT MODE] 📤 Sent to UI: '{full_transcription}'")
+            committed, partial = carried, ""
+            if len(audio_data):
+                # SAFETY: Timeout after 5.0s (Models can take time to warm up); the timeout also
+                # cancels the window in the scheduler, so the backend stops at its next segment
+                # Whisper VAD disabled: the frame-level VAD gate already skips silence
+                words = await asyncio.wait_for(
+                    get_scheduler().submit(session_id, audio_data, lang_code, vad_filter=False,
+                                           prompt=stream.prompt(), word_timestamps=True), 
+                    timeout=5.0
+                )
+                if words is None: return
+                new, partial = stream.apply(words, end if capped else None)
+                committed = f"{committed} {new}".strip()
+            if final:
+                # Speech endpoint: pending hypothesis becomes final (up to the end of this window)
+                committed = f"{committed} {stream.finalize(end)}".strip()
+                partial = ""
+                if capped:
+                    vad.endpoint_pending = True  # the utterance continues in the backlog: finalize that too
+            
+            committed = filter_hallucinations(committed)
+            carried_merged = True
+            turnaround_ms = int((time.time() - process_start) * 1000)
+            metrics.TURNAROUND_SECONDS.observe(turnaround_ms / 1000, path="agent")
+            if committed:
+                await publish(committed, True, turnaround_ms)
+                logger.info(f"[AGENT MODE] 📤 Sent to UI: '{committed}'")
+            if partial and partial != stream.partial_sent:
+                await publish(partial, False, turnaround_ms)
+            stream.partial_sent = partial
+            backpressure.record(end)
+        except SchedulerBusy as e:
+            # Admission control: skip this pass, the audio stays in the stream buffer
+            logger.warning(f"[AGENT MODE] ⏳ Deferred: {e}")
+        except asyncio.TimeoutError:
+            metrics.WINDOWS_TIMED_OUT.inc()
+            logger.warning(f"[AGENT MODE] ⌛ Inference timed out for {participant.identity}")
         except Exception as e:
             logger.error(f"[AGENT MODE] Task failed: {e}")
+        finally:
+            # `carried` was committed when backpressure cut its audio from the ring: it must
+            # reach the transcript even if this pass is cancelled, deferred, times out or fails
+            text = filter_hallucinations(carried) if carried and not carried_merged else ""
+            if text:
+                try:
+                    await publish(text, True, int((time.time() - process_start) * 1000))
+                    logger.info(f"[AGENT MODE] 📤 Sent to UI (carried): '{text}'")
+                except Exception as e:
+                    logger.error(f"[AGENT MODE] Could not publish carried text: {e}")
 
     # Main Loop
     processing_task = None
     frame_count = 0
+    last_launch = 0 # Absolute sample index when the last step was launched
+    silent = False  # last check found silence
     try:
         async for event in audio_stream:
             await asyncio.sleep(0)
-            audio_buffer.extend(event.frame.data.tobytes())
+            # Zero-copy view of the frame, resampled into reused buffers and copied once into the ring
+            frame = converter.process(np.frombuffer(event.frame.data, dtype=np.int16))
+            stream.insert_audio(frame)
+            vad.process(frame)
+            backpressure.on_frame()
             
             frame_count += 1
             if frame_count % 2000 == 0:
-                 logger.info(f"[AGENT] Audio session active for {participant.identity}...")
+                 logger.info(f"[AGENT] Audio session active for {participant.identity} "
+                             f"(lag {backpressure.lag:.1f}s, backlog {backpressure.backlog_seconds:.1f}s)...")
 
             # Dynamic Batching
-            if len(audio_buffer) >= BUFFER_SIZE_BYTES:
-                # If busy, keep buffering (don't clear, just accumulate context!)
-                if processing_task and not processing_task.done():
-                    continue 
-                
-                # Ready to process - Move data to numpy
-                audio_np = np.frombuffer(audio_buffer, dtype=np.int16).astype(np.float32) / 32768.0
+            # Endpoints and speech onsets are handled right away; during speech run every BUFFER_SECONDS
+            if not model_ready():
+                continue  # Model still loading/warming: keep buffering
+            if (vad.endpoint_pending or (silent and vad.in_speech)
+                    or stream.ring.total_written - last_launch >= BUFFER_SIZE_SAMPLES):
+                # If busy, keep buffering (the ring keeps accumulating context!)
+                # Silence: no model call at all
+                step = next_stream_step(stream, vad, processing_task, "agent", session_id)
+                if step is None:
+                    if processing_task is None or processing_task.done():
+                        # Silence: check (and count) again after BUFFER_SECONDS, or as soon as speech starts
+                        last_launch = stream.ring.total_written
+                        silent = True
+                    continue
+                silent = False
                 
-                # CLEAR logic: We clear the buffer because we've converted it to audio_np
-                audio_buffer.clear()
+                # Backpressure: at most AGENT_MAX_WINDOW_S per pass; a capped (coalesce) window
+                # ends before the live edge, so the next pass starts right after this one
+                audio_data, end, carried = backpressure.prepare(keep_samples=vad.preroll_samples)
+                capped = end < stream.ring.total_written
+                last_launch = end
                 
                 # Launch background task
                 current_lang = participant_configs.get(participant.identity, {}).get("language", "en")
-                processing_task = asyncio.create_task(process_step(audio_np, current_lang))
+                processing_task = asyncio.create_task(
+                    process_step(current_lang, audio_data, end, final=(step == "final"), capped=capped, carried=carried),
+                    name=f"{session_id}:{step}")
 
 
     except asyncio.CancelledError:
         logger.info(f"[AGENT MODE] 🛑 Audio processing task cancelled for {participant.identity}")
         return # Exit cleanly
+    finally:
+        # Participant left or the agent stopped: drop inference nobody will publish
+        if inference_scheduler is not None:
+            inference_scheduler.cancel_session(session_id)
+        metrics.ACTIVE_SESSIONS.dec(path="agent")
+        metrics.BUFFER_BYTES.dec(buffer_bytes)
+        if agent is not None and agent.participants.get(participant.identity) is backpressure:
+            del agent.participants[participant.identity]
 
 
 # --- Main Application Runner ---
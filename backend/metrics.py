@@ -0,0 +1,174 @@
+"""
+Minimal Prometheus-style metrics (text exposition format 0.0.4) for `/api/metrics`.
+
+Counters, gauges and histograms with optional labels, safe to update from executor
+threads. No external dependency: the registry renders itself.
+"""
+import threading
+import time
+
+# Latency buckets in seconds (decode/queue/inference/TAT) and real-time-factor buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def total(self) -> float:
+        """Sum over all label combinations."""
+        with self._lock:
+            return sum(self._values.values())
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    """Settable value, or computed at scrape time when `fn` is given."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), fn=None):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> list:
+        if self.fn is not None:
+            return [f"{self.name} {float(self.fn())}"]
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+REGISTRY = []
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Pipeline metrics ---
+DECODE_SECONDS = Histogram("asr_decode_seconds", "Time spent decoding one incoming audio chunk", ("path",))
+QUEUE_WAIT_SECONDS = Histogram("asr_queue_wait_seconds", "Time a window waited in the inference scheduler")
+INFERENCE_SECONDS = Histogram("asr_inference_seconds", "Wall time of one inference batch", ("backend",))
+TURNAROUND_SECONDS = Histogram("asr_turnaround_seconds", "End-to-end time from launching a pass to sending its transcript", ("path",))
+REAL_TIME_FACTOR = Histogram("asr_real_time_factor", "Inference time divided by audio duration per batch", buckets=RTF_BUCKETS)
+BATCH_SIZE = Histogram("asr_batch_size", "Windows per inference batch", buckets=(1, 2, 4, 8, 16, 32))
+
+WINDOWS_SKIPPED_SILENT = Counter("asr_windows_skipped_silent_total", "Passes skipped by the VAD gate (no speech)", ("path",))
+WINDOWS_DROPPED = Counter("asr_windows_dropped_total", "Queued windows superseded by a newer window of the same session")
+WINDOWS_REJECTED = Counter("asr_windows_rejected_total", "Windows rejected by admission control (queue full)")
+WINDOWS_TIMED_OUT = Counter("asr_windows_timed_out_total", "Passes abandoned after the agent inference timeout")
+WINDOWS_CANCELLED = Counter("asr_windows_cancelled_total",
+                            "Windows cancelled before (queued) or during (running) inference", ("stage",))
+CACHE_LOOKUPS = Counter("asr_cache_lookups_total", "Transcription cache lookups", ("result",))
+TRANSCRIPTS_SENT = Counter("asr_transcripts_sent_total", "Transcript messages sent to clients", ("path", "kind"))
+
+AGENT_LAG_SECONDS = Histogram("asr_agent_lag_seconds", "How far behind real time an agent transcript was when published",
+                              buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0))
+AUDIO_DISCARDED_SECONDS = Counter("asr_audio_discarded_seconds_total", "Uncommitted agent audio discarded by backpressure",
+                                  ("strategy",))
+EVENT_LOOP_LAG_SECONDS = Histogram("asr_event_loop_lag_seconds", "How late the event loop ran a periodic probe",
+                                   buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+QOS_TIER = Gauge("asr_qos_tier", "Active quality-of-service tier (0 = configured model)")
+QOS_TIER_CHANGES = Counter("asr_qos_tier_changes_total", "QoS tier changes", ("direction",))
+ACTIVE_SESSIONS = Gauge("asr_active_sessions", "Open transcription sessions", ("path",))
+ACTIVE_AGENTS = Gauge("asr_active_agents", "LiveKit rooms with a running agent")
+BUFFER_BYTES = Gauge("asr_buffer_bytes", "Bytes preallocated for per-session audio buffers")
@@ -0,0 +1,192 @@
+"""
+Language-aware model routing for `MedicalASR`.
+
+The primary (`MODEL_SIZE`, multilingual) model is always loaded. Languages listed in
+the route table (by default English -> the `.en` variant of the same size, which is
+faster at equal accuracy) are served by extra models that are loaded lazily, in the
+background, the first time that language is requested; until then the primary model
+serves it. Extra models live in an LRU bounded by a RAM budget: the least recently
+used idle model is unloaded to make room.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import model_store
+
+logger = logging.getLogger("asr-worker")
+
+# Approximate fp16 footprint per model size (MB), used when the model files are not on disk
+_SIZE_MB = {"tiny": 75, "base": 145, "small": 485, "medium": 1530, "large": 3100, "distil": 1510}
+ENGLISH_VARIANTS = ("tiny", "base", "small", "medium")
+RETRY_SECONDS = 60
+
+
+def default_routes(model_size: str) -> dict:
+    """English -> `<size>.en` when that variant exists."""
+    if model_size in ENGLISH_VARIANTS:
+        return {"en": f"{model_size}.en"}
+    return {}
+
+
+def parse_routes(spec: str, model_size: str) -> dict:
+    """`ASR_LANGUAGE_MODELS`: "auto", "none", or "en=small.en,de=medium"."""
+    spec = (spec or "auto").strip()
+    if spec == "auto":
+        return default_routes(model_size)
+    if spec in ("none", "off", "0"):
+        return {}
+    routes = {}
+    for item in spec.split(","):
+        if "=" in item:
+            language, name = item.split("=", 1)
+            routes[language.strip()] = name.strip()
+    return routes
+
+
+def estimate_model_bytes(name: str, compute_type: str) -> int:
+    """Size of the converted model files if cached locally, else a per-size estimate."""
+    try:
+        try:
+            path = model_store.verify(name)
+        except ValueError:
+            from faster_whisper.utils import download_model
+            path = download_model(name, local_files_only=True)
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    except Exception:
+        pass
+    base = name.split(".")[0].split("-")[0]
+    mb = _SIZE_MB.get(base, _SIZE_MB["small"])
+    if "int8" in compute_type:
+        mb //= 2
+    return mb * 1024 * 1024
+
+
+class LoadedModel:
+    """One model name: its instances and the checkout pool over them."""
+    def __init__(self, name: str, models: list, slots_per_model: int, nbytes: int):
+        self.name = name
+        self.models = models
+        self.nbytes = nbytes
+        self.pool = queue.Queue()
+        for _ in range(max(1, slots_per_model)):
+            for model in models:
+                self.pool.put(model)
+        self.slots = self.pool.qsize()
+        self.in_use = 0
+        self.last_used = time.time()
+
+    def info(self) -> dict:
+        return {"name": self.name, "instances": len(self.models), "slots": self.slots,
+                "idle_slots": self.pool.qsize(), "mb": round(self.nbytes / 1024 / 1024)}
+
+
+class ModelRouter:
+    """
+    Picks the model for a request's language. `load_fn(name) -> LoadedModel` runs on a
+    background thread; `ram_budget` (bytes) bounds primary + extra models, checked
+    against `estimate_fn(name)` before anything is loaded.
+    """
+    def __init__(self, primary: LoadedModel, routes: dict, load_fn, ram_budget: int, estimate_fn):
+        self.primary = primary
+        self.routes = routes
+        self.load_fn = load_fn
+        self.estimate_fn = estimate_fn
+        self.ram_budget = ram_budget
+        self.variants = OrderedDict()  # name -> LoadedModel, least recently used first
+        self.loading = set()
+        self.retry_at = {}
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def resolve(self, language: str, tier: str = None) -> str:
+        """Model name for `language`; a QoS `tier` (model size) overrides the primary size."""
+        if not tier:
+            return self.routes.get(language)
+        if self.routes.get(language, "").endswith(".en") and tier in ENGLISH_VARIANTS:
+            return f"{tier}.en"
+        return tier
+
+    def route(self, language: str, tier: str = None) -> LoadedModel:
+        name = self.resolve(language, tier)
+        if not name or name == self.primary.name:
+            return self.primary
+        with self.lock:
+            variant = self.variants.get(name)
+            if variant is not None:
+                self.variants.move_to_end(name)
+                return variant
+            if name not in self.loading and time.time() >= self.retry_at.get(name, 0):
+                self.loading.add(name)
+                threading.Thread(target=self._load, args=(name,), name=f"asr-load-{name}", daemon=True).start()
+        return self.primary  # served by the multilingual model until the variant is ready
+
+    def _used_bytes(self) -> int:
+        return self.primary.nbytes + sum(v.nbytes for v in self.variants.values())
+
+    def _make_room(self, needed: int) -> bool:
+        """Evicts idle variants (LRU first) until `needed` bytes fit. Caller holds the lock."""
+        for name in list(self.variants):
+            if self._used_bytes() + needed <= self.ram_budget:
+                break
+            variant = self.variants[name]
+            if variant.in_use == 0:
+                del self.variants[name]
+                self.evictions += 1
+                logger.info(f"[MODELS] Unloaded '{name}' (LRU, {variant.nbytes / 1024 / 1024:.0f} MB)")
+        return self._used_bytes() + needed <= self.ram_budget
+
+    def _load(self, name: str):
+        try:
+            needed = self.estimate_fn(name)
+            with self.lock:
+                if not self._make_room(needed):
+                    logger.warning(f"[MODELS] '{name}' ({needed / 1024 / 1024:.0f} MB) does not fit the "
+                                   f"RAM budget ({self.ram_budget / 1024 / 1024:.0f} MB); keeping the primary model")
+                    self.retry_at[name] = time.time() + RETRY_SECONDS
+                    return
+            t_start = time.time()
+            variant = self.load_fn(name)
+            with self.lock:
+                self._make_room(variant.nbytes)
+                self.variants[name] = variant
+            logger.info(f"[MODELS] Loaded '{name}' in {time.time() - t_start:.1f}s")
+        except Exception as e:
+            logger.warning(f"[MODELS] Could not load '{name}': {e}")
+            self.retry_at[name] = time.time() + RETRY_SECONDS
+        finally:
+            with self.lock:
+                self.loading.discard(name)
+
+    @contextmanager
+    def checkout(self, language: str = None, timeout: float = None, loaded: LoadedModel = None, tier: str = None):
+        """Borrows an instance of the language's model (or of `loaded`, from a previous `route`)."""
+        loaded = loaded or self.route(language, tier)
+        with self.lock:
+            loaded.in_use += 1
+            loaded.last_used = time.time()
+        try:
+            model = loaded.pool.get(timeout=timeout)
+            try:
+                yield model
+            finally:
+                loaded.pool.put(model)
+        finally:
+            with self.lock:
+                loaded.in_use -= 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "routes": dict(self.routes),
+                "primary": self.primary.info(),
+                "variants": [v.info() for v in self.variants.values()],
+                "loading": sorted(self.loading),
+                "ram_used_mb": round(self._used_bytes() / 1024 / 1024),
+                "ram_budget_mb": round(self.ram_budget / 1024 / 1024),
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,99 @@
+"""
+Pinned local copies of the Whisper models (`ASR_MODEL_DIR`).
+
+`download_model.py` fetches every configured model (`MODEL_SIZE`, its language routes
+and QoS tiers) into `<ASR_MODEL_DIR>/<name>/` and writes a manifest with each file's
+size and SHA-256. At startup `MedicalASR` loads from that directory once the manifest
+checks out, so a cold start never touches the Hugging Face hub resolution path. Startup
+checks sizes only (cheap); `verify_model.py` re-hashes everything.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger("asr-worker")
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "asr-worker", "models")
+MANIFEST = "asr-manifest.json"
+
+
+def model_dir() -> str:
+    return os.getenv("ASR_MODEL_DIR", DEFAULT_DIR)
+
+
+def configured_models(model_size: str = None, routes_spec: str = None, tiers_spec: str = None) -> list:
+    """Every model this deployment may load: the primary, its language routes and QoS tiers (+ `.en`)."""
+    from model_router import ENGLISH_VARIANTS, parse_routes
+    from qos import parse_tiers
+    model_size = model_size or os.getenv("MODEL_SIZE", "small")
+    routes = parse_routes(routes_spec or os.getenv("ASR_LANGUAGE_MODELS", "auto"), model_size)
+    tiers = parse_tiers(tiers_spec or os.getenv("ASR_QOS_TIERS", "auto"), model_size)
+    names = [model_size, *routes.values()]
+    english_routed = any(name.endswith(".en") for name in routes.values())
+    for tier in tiers:
+        names.append(tier)
+        if english_routed and tier in ENGLISH_VARIANTS:
+            names.append(f"{tier}.en")
+    return list(dict.fromkeys(names))
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fetch(name: str, root: str = None, revision: str = None) -> str:
+    """Downloads `name` into `<root>/<name>` (plain files, no hub cache symlinks) and writes its manifest."""
+    from faster_whisper.utils import download_model
+    path = os.path.join(root or model_dir(), name)
+    download_model(name, output_dir=path, revision=revision)
+    files = {}
+    for entry in sorted(os.listdir(path)):
+        full = os.path.join(path, entry)
+        if entry != MANIFEST and os.path.isfile(full):
+            files[entry] = {"bytes": os.path.getsize(full), "sha256": _sha256(full)}
+    manifest = {"name": name, "revision": revision, "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "files": files}
+    with open(os.path.join(path, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+def verify(name: str, root: str = None, deep: bool = False) -> str:
+    """
+    Path of the verified local copy of `name`. Raises `ValueError` when it is missing,
+    incomplete or (with `deep`) its content no longer matches the manifest.
+    """
+    path = os.path.join(root or model_dir(), name)
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            files = json.load(f)["files"]
+    except (OSError, ValueError, KeyError):
+        raise ValueError(f"no manifest for '{name}' in {path} (run download_model.py)")
+    if "model.bin" not in files:
+        raise ValueError(f"manifest for '{name}' lists no model.bin")
+    for entry, expected in files.items():
+        full = os.path.join(path, entry)
+        if not os.path.isfile(full) or os.path.getsize(full) != expected["bytes"]:
+            raise ValueError(f"'{name}': {entry} is missing or truncated")
+        if deep and _sha256(full) != expected["sha256"]:
+            raise ValueError(f"'{name}': {entry} does not match its checksum")
+    return path
+
+
+def resolve(name: str) -> str:
+    """
+    What to pass to `WhisperModel`: the verified local directory, else `name` itself
+    (hub lookup) unless `ASR_MODEL_OFFLINE=1`, which makes a missing copy an error.
+    """
+    try:
+        return verify(name)
+    except ValueError as e:
+        if os.getenv("ASR_MODEL_OFFLINE", "0") == "1":
+            raise RuntimeError(f"model '{name}' not available offline: {e}")
+        logger.warning(f"[MODELS] {e}; resolving '{name}' through the hub cache")
+        return name
@@ -0,0 +1,127 @@
+"""
+Load-adaptive quality-of-service tiers.
+
+Under pressure (inference queue backing up, or windows taking a large fraction of
+their own duration to decode) sessions step down to a smaller model and a shorter
+maximum window; when load drops they step back up. Separate high/low thresholds
+plus dwell times (a few seconds to step down, longer to step up) give hysteresis,
+so the tier does not flap around a threshold. Slightly worse text beats no text.
+"""
+import asyncio
+import logging
+import os
+
+import metrics
+
+logger = logging.getLogger("asr-worker")
+
+# Largest to smallest; a tier list is MODEL_SIZE followed by the next smaller sizes
+SIZE_ORDER = ("large", "medium", "small", "base", "tiny")
+WINDOW_SECONDS = (15.0, 10.0, 6.0)  # max uncommitted window per tier
+
+QOS_HIGH_RTF = float(os.getenv("ASR_QOS_HIGH_RTF", 0.7))
+QOS_LOW_RTF = float(os.getenv("ASR_QOS_LOW_RTF", 0.35))
+QOS_DOWN_AFTER_S = float(os.getenv("ASR_QOS_DOWN_AFTER_S", 2))
+QOS_UP_AFTER_S = float(os.getenv("ASR_QOS_UP_AFTER_S", 15))
+
+
+def default_tiers(model_size: str, depth: int = 3) -> list:
+    """e.g. small -> [small, base, tiny]; medium -> [medium, small, base]."""
+    base = model_size.split(".")[0]
+    family = "large" if base.startswith("large") else base
+    if family not in SIZE_ORDER:
+        return [model_size]
+    index = SIZE_ORDER.index(family)
+    return [model_size] + list(SIZE_ORDER[index + 1:index + depth])
+
+
+def parse_tiers(spec: str, model_size: str) -> list:
+    """`ASR_QOS_TIERS`: "auto", "off", or "small,base,tiny"."""
+    spec = (spec or "auto").strip()
+    if spec == "auto":
+        return default_tiers(model_size)
+    if spec in ("off", "none", "0"):
+        return [model_size]
+    return [t.strip() for t in spec.split(",") if t.strip()]
+
+
+class QoSController:
+    """
+    Watches `scheduler` once per `interval` and publishes the active tier on it
+    (`scheduler.model_tier`: model name for new windows, None = configured model)
+    and as `window_seconds` for the ingest paths.
+    """
+    def __init__(self, scheduler, tiers: list, interval: float = 1.0):
+        self.scheduler = scheduler
+        self.tiers = tiers
+        self.interval = interval
+        self.tier = 0
+        self.high_ticks = 0
+        self.low_ticks = 0
+        self.changes = 0
+        self._task = None
+        metrics.QOS_TIER.set(0)
+
+    @property
+    def window_seconds(self) -> float:
+        return WINDOW_SECONDS[min(self.tier, len(WINDOW_SECONDS) - 1)]
+
+    def pressure(self) -> str:
+        """"high", "low" or "normal" from queue depth and recent per-window RTF."""
+        depth = self.scheduler.queue_depth
+        rtf = self.scheduler.window_rtf
+        if depth >= 2 * self.scheduler.max_concurrency or rtf >= QOS_HIGH_RTF:
+            return "high"
+        if depth == 0 and rtf <= QOS_LOW_RTF:
+            return "low"
+        return "normal"
+
+    def tick(self):
+        if self.scheduler.queue_depth == 0 and self.scheduler.live_in_flight == 0:
+            self.scheduler.window_rtf *= 0.8  # idle: no batches to measure, let the last reading fade
+        pressure = self.pressure()
+        self.high_ticks = self.high_ticks + 1 if pressure == "high" else 0
+        self.low_ticks = self.low_ticks + 1 if pressure == "low" else 0
+
+        if self.high_ticks * self.interval >= QOS_DOWN_AFTER_S and self.tier < len(self.tiers) - 1:
+            self._set_tier(self.tier + 1, "down")
+        elif self.low_ticks * self.interval >= QOS_UP_AFTER_S and self.tier > 0:
+            self._set_tier(self.tier - 1, "up")
+
+    def _set_tier(self, tier: int, direction: str):
+        previous = self.tiers[self.tier]
+        self.tier = tier
+        self.high_ticks = self.low_ticks = 0
+        self.changes += 1
+        self.scheduler.model_tier = self.tiers[tier] if tier > 0 else None
+        metrics.QOS_TIER.set(tier)
+        metrics.QOS_TIER_CHANGES.inc(direction=direction)
+        log = logger.warning if direction == "down" else logger.info
+        log(f"[QOS] {'⬇️' if direction == 'down' else '⬆️'} Tier {previous} -> {self.tiers[tier]} "
+            f"(max window {self.window_seconds:.0f}s)")
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"[QOS] Controller error: {e}")
+
+    def start(self):
+        if len(self.tiers) > 1:
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "tier": self.tier,
+            "model": self.tiers[self.tier],
+            "tiers": self.tiers,
+            "window_seconds": self.window_seconds,
+            "window_rtf": round(self.scheduler.window_rtf, 3),
+            "changes": self.changes,
+        }
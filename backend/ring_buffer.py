@@ -0,0 +1,83 @@
+"""
+Fixed-capacity PCM ring buffer for per-session audio.
+
+Samples are stored as int16 in a mirrored array (every sample is written at `i` and
+`i + capacity`), so any window of up to `capacity` samples is a contiguous slice and
+can be returned as a zero-copy view. Only the int16 store is allocated up front:
+float32 reads get their own array per read (one per inference pass), and float32
+writes convert through a frame-sized scratch array that is grown on first use.
+"""
+import numpy as np
+
+from dsp import float32_to_int16, int16_to_float32
+
+
+class PCMRingBuffer:
+    """
+    Bounded mono int16 PCM store. `total_written` counts every sample ever written,
+    so callers can address audio by absolute sample index.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=np.int16)
+        self._convert = None  # float32 write scratch, sized to the largest frame written
+        self.total_written = 0
+
+    def __len__(self) -> int:
+        return min(self.total_written, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory currently held by the store and its write scratch."""
+        return self._data.nbytes + (self._convert.nbytes if self._convert is not None else 0)
+
+    @property
+    def oldest_index(self) -> int:
+        """Absolute index of the oldest sample still held."""
+        return self.total_written - len(self)
+
+    def write(self, samples: np.ndarray):
+        """Appends int16 samples (or float32 in [-1, 1], converted on the way in)."""
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            self.total_written += n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+
+        pos = self.total_written % self.capacity
+        first = min(n, self.capacity - pos)
+        self._store(pos, samples[:first])
+        if first < n:
+            self._store(0, samples[first:])
+        self.total_written += n
+
+    def _store(self, pos: int, samples: np.ndarray):
+        end = pos + len(samples)
+        mirror = self._data[pos + self.capacity:end + self.capacity]
+        if samples.dtype == np.int16:
+            self._data[pos:end] = samples
+        else:
+            # float32 -> int16 without an intermediate array per slot
+            if self._convert is None or len(self._convert) < len(samples):
+                self._convert = np.empty(len(samples), dtype=np.float32)
+            float32_to_int16(samples, out=self._data[pos:end], scratch=self._convert)
+        mirror[:] = self._data[pos:end]
+
+    def view(self, n: int, end: int = None) -> np.ndarray:
+        """
+        Zero-copy int16 view of `n` samples ending at absolute index `end`
+        (default: the newest sample). Valid until the region is overwritten.
+        """
+        end = self.total_written if end is None else min(end, self.total_written)
+        n = max(0, min(n, end - self.oldest_index))
+        start = (end - n) % self.capacity
+        return self._data[start:start + n]
+
+    def read_float32(self, n: int, end: int = None, out: np.ndarray = None) -> np.ndarray:
+        """
+        Converts a window to float32 in [-1, 1] into `out`
+        (default: a new array owned by the caller).
+        """
+        return int16_to_float32(self.view(n, end), out=out)
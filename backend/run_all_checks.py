@@ -4,7 +4,7 @@ Run all verification checks in sequence
 import subprocess
 import sys
 
-def run_script(script_name, description):
+def run_script(script_name, description, timeout=60):
     """Run a verification script and report results."""
     print("\n" + "=" * 60)
     print(f"  {description}")
@@ -15,7 +15,7 @@ def run_script(script_name, description):
             [sys.executable, script_name],
             capture_output=True,
             text=True,
-            timeout=60
+            timeout=timeout
         )
         
         print(result.stdout)
@@ -34,15 +34,16 @@ def main():
     print("  COMPREHENSIVE BACKEND VERIFICATION")
     print("🔍 " * 20)
     
+    # Download first: verify_model.py checks the local copies download_model.py creates
     scripts = [
-        ("verify_packages.py", "Checking Package Installation"),
-        ("verify_model.py", "Checking Model Availability"),
-        ("download_model.py", "Verifying Model Download"),
+        ("verify_packages.py", "Checking Package Installation", 60),
+        ("download_model.py", "Downloading Configured Models", 1800),
+        ("verify_model.py", "Checking Model Availability", 600),
     ]
     
     results = []
-    for script, desc in scripts:
-        success = run_script(script, desc)
+    for script, desc, timeout in scripts:
+        success = run_script(script, desc, timeout)
         results.append((desc, success))
     
     # Summary
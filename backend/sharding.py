@@ -0,0 +1,297 @@
+"""
+Multi-node sharding of agent rooms and WebSocket sessions.
+
+Every node heartbeats its address, capacity and current load into a shared
+`ClusterStore`. Keys (room names, session ids) map to nodes by consistent hashing,
+so a node joining or leaving only moves the keys it owned; a node at capacity is
+skipped in favour of the next one on the ring (load-aware override). Agent rooms are
+sticky: the first placement is recorded in the store (`ClusterCoordinator.assign`) and
+reused while that node is alive, so load changes never split a room across nodes.
+
+Stores are pluggable (`CLUSTER_STORE`):
+  * `memory`          - process-local, i.e. a single-node cluster (default)
+  * `file:<dir>`      - one JSON file per node in a shared directory (local multi-process
+                        testing, or a shared volume); writes are atomic renames
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger("asr-worker")
+
+
+class ClusterStore:
+    """
+    Node registry interface: `put_node`, `list_nodes`, `remove_node`; plus key -> node
+    assignments: `get_assignment`, `claim_assignment` (first writer wins),
+    `put_assignment` (overwrite) and `remove_assignment`.
+    """
+    def put_node(self, info: dict):
+        raise NotImplementedError
+
+    def list_nodes(self) -> list:
+        raise NotImplementedError
+
+    def remove_node(self, node_id: str):
+        raise NotImplementedError
+
+    def get_assignment(self, key: str):
+        raise NotImplementedError
+
+    def claim_assignment(self, key: str, record: dict) -> dict:
+        """Stores `record` unless `key` is already assigned; returns the stored record."""
+        raise NotImplementedError
+
+    def put_assignment(self, key: str, record: dict):
+        raise NotImplementedError
+
+    def remove_assignment(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryStore(ClusterStore):
+    def __init__(self):
+        self.nodes = {}
+        self.assignments = {}
+
+    def put_node(self, info: dict):
+        self.nodes[info["node_id"]] = dict(info)
+
+    def list_nodes(self) -> list:
+        return [dict(n) for n in self.nodes.values()]
+
+    def remove_node(self, node_id: str):
+        self.nodes.pop(node_id, None)
+
+    def get_assignment(self, key: str):
+        record = self.assignments.get(key)
+        return dict(record) if record else None
+
+    def claim_assignment(self, key: str, record: dict) -> dict:
+        return dict(self.assignments.setdefault(key, dict(record)))
+
+    def put_assignment(self, key: str, record: dict):
+        self.assignments[key] = dict(record)
+
+    def remove_assignment(self, key: str):
+        self.assignments.pop(key, None)
+
+
+class FileStore(ClusterStore):
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.assignment_dir = os.path.join(directory, "assignments")
+        os.makedirs(self.assignment_dir, exist_ok=True)
+
+    def _path(self, node_id: str) -> str:
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in node_id)
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def put_node(self, info: dict):
+        path = self._path(info["node_id"])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(info, f)
+        os.replace(tmp, path)
+
+    def list_nodes(self) -> list:
+        nodes = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    nodes.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # being replaced or removed right now
+        return nodes
+
+    def remove_node(self, node_id: str):
+        try:
+            os.remove(self._path(node_id))
+        except FileNotFoundError:
+            pass
+
+    def _assignment_path(self, key: str) -> str:
+        return os.path.join(self.assignment_dir, f"{hashlib.md5(key.encode('utf-8')).hexdigest()}.json")
+
+    def _write_tmp(self, path: str, record: dict) -> str:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(record, f)
+        return tmp
+
+    def get_assignment(self, key: str):
+        try:
+            with open(self._assignment_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def claim_assignment(self, key: str, record: dict) -> dict:
+        path = self._assignment_path(key)
+        tmp = self._write_tmp(path, record)
+        try:
+            os.link(tmp, path)  # atomic create: fails if another node claimed the key first
+            return dict(record)
+        except FileExistsError:
+            return self.get_assignment(key) or dict(record)
+        finally:
+            os.remove(tmp)
+
+    def put_assignment(self, key: str, record: dict):
+        path = self._assignment_path(key)
+        os.replace(self._write_tmp(path, record), path)
+
+    def remove_assignment(self, key: str):
+        try:
+            os.remove(self._assignment_path(key))
+        except FileNotFoundError:
+            pass
+
+
+def create_store(spec: str) -> ClusterStore:
+    if not spec or spec == "memory":
+        return MemoryStore()
+    if spec.startswith("file:"):
+        return FileStore(spec[len("file:"):])
+    raise ValueError(f"Unknown CLUSTER_STORE '{spec}' (expected 'memory' or 'file:<dir>')")
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring with `vnodes` virtual points per node."""
+    def __init__(self, node_ids: list, vnodes: int = 64):
+        points = sorted((_hash(f"{node_id}#{i}"), node_id) for node_id in node_ids for i in range(vnodes))
+        self.hashes = [h for h, _ in points]
+        self.owners = [n for _, n in points]
+
+    def candidates(self, key: str) -> list:
+        """Distinct nodes in ring order starting at the key's owner."""
+        if not self.hashes:
+            return []
+        start = bisect.bisect(self.hashes, _hash(key)) % len(self.hashes)
+        seen = []
+        for i in range(len(self.owners)):
+            node_id = self.owners[(start + i) % len(self.owners)]
+            if node_id not in seen:
+                seen.append(node_id)
+        return seen
+
+
+class ClusterCoordinator:
+    """
+    This node's membership: heartbeats into the store and routes keys to nodes.
+    `load_fn()` returns the node's current load (sessions + agents).
+    """
+    def __init__(self, node_id: str, url: str, capacity: int, store: ClusterStore, load_fn,
+                 heartbeat_interval: float = 5.0, ttl: float = 15.0, assignment_ttl: float = 6 * 3600):
+        self.node_id = node_id
+        self.url = url.rstrip("/")
+        self.capacity = max(1, capacity)
+        self.store = store
+        self.load_fn = load_fn
+        self.heartbeat_interval = heartbeat_interval
+        self.ttl = ttl
+        self.assignment_ttl = assignment_ttl  # bound on leaked assignments (released when the agent ends)
+        self.nodes = {}
+        self.ring = HashRing([])
+        self._task = None
+
+    def _info(self) -> dict:
+        return {
+            "node_id": self.node_id,
+            "url": self.url,
+            "capacity": self.capacity,
+            "load": self.load_fn(),
+            "heartbeat_at": time.time(),
+        }
+
+    def refresh(self):
+        """Publishes this node's heartbeat and rebuilds the ring from live nodes."""
+        self.store.put_node(self._info())
+        now = time.time()
+        live = {n["node_id"]: n for n in self.store.list_nodes() if now - n.get("heartbeat_at", 0) <= self.ttl}
+        live[self.node_id] = self._info()  # never route away from ourselves because of clock skew
+        if set(live) != set(self.nodes):
+            logger.info(f"[CLUSTER] Members: {sorted(live)}")
+            self.ring = HashRing(list(live))
+        self.nodes = live
+
+    async def _heartbeat_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"[CLUSTER] Heartbeat failed: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def start(self):
+        self.refresh()
+        self._task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        try:
+            self.store.remove_node(self.node_id)
+        except Exception:
+            pass
+
+    def owner(self, key: str) -> dict:
+        """
+        Node for `key`: its ring owner, or the next node with spare capacity when the
+        owner is full. If every node is full, the ring owner takes it anyway.
+        """
+        if self.node_id in self.nodes:
+            self.nodes[self.node_id]["load"] = self.load_fn()  # local load is always fresh
+        candidates = self.ring.candidates(key)
+        for node_id in candidates:
+            node = self.nodes[node_id]
+            if node.get("load", 0) < node.get("capacity", 1):
+                return node
+        return self.nodes[candidates[0]] if candidates else self._info()
+
+    def assign(self, key: str) -> dict:
+        """
+        Sticky `owner` for agent rooms: the node recorded for `key` while it is alive,
+        else `owner(key)`, claimed in the store (if two nodes race, the first claim wins).
+        """
+        record = self.store.get_assignment(key)
+        if record is not None:
+            node = self.nodes.get(record.get("node_id"))
+            if node is not None and time.time() - record.get("at", 0) <= self.assignment_ttl:
+                return node
+            self.store.remove_assignment(key)  # owner died (or the record leaked): place the room again
+        node = self.owner(key)
+        record = self.store.claim_assignment(key, {"node_id": node["node_id"], "at": time.time()})
+        return self.nodes.get(record["node_id"], node)
+
+    def reassign(self, key: str, node_id: str):
+        """Records `node_id` as the key's node (e.g. after running a room locally as fallback)."""
+        self.store.put_assignment(key, {"node_id": node_id, "at": time.time()})
+
+    def release(self, key: str):
+        """Forgets the key's node once its work there has ended."""
+        record = self.store.get_assignment(key)
+        if record is not None and record.get("node_id") == self.node_id:
+            self.store.remove_assignment(key)
+
+    def is_local(self, node: dict) -> bool:
+        return node["node_id"] == self.node_id
+
+    def stats(self) -> dict:
+        return {
+            "node_id": self.node_id,
+            "nodes": [
+                {k: n.get(k) for k in ("node_id", "url", "capacity", "load")}
+                for n in sorted(self.nodes.values(), key=lambda n: n["node_id"])
+            ],
+        }
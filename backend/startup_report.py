@@ -0,0 +1,40 @@
+"""
+Cold-start timing by phase (imports, model verify/load, warm-up, ...), so the
+autoscaler's time-to-ready can be attributed. Served under `startup` in `/api/health`.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("asr-worker")
+
+
+class StartupReport:
+    """Phase durations in order of completion; `started` is a `time.perf_counter()` reading."""
+    def __init__(self, started: float = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases = {}
+        self.ready_after = None
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        t_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t_start)
+
+    def ready(self):
+        """Marks the process ready to serve and logs the breakdown."""
+        self.ready_after = time.perf_counter() - self.started
+        breakdown = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        logger.info(f"[STARTUP] ⏱️ Ready {self.ready_after:.2f}s after import: {breakdown}")
+
+    def stats(self) -> dict:
+        return {
+            "phases_s": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "ready_after_s": round(self.ready_after, 3) if self.ready_after is not None else None,
+        }
@@ -0,0 +1,160 @@
+"""
+Streaming hypothesis stabilisation (LocalAgreement-2).
+
+Each session keeps only the audio that has not been committed yet. Every inference
+pass re-decodes that uncommitted tail (with the committed text as prompt); words that
+two consecutive passes agree on are committed and sent as finals, the rest is sent as
+a partial. Committed audio is trimmed from the buffer, so the cost per call stays
+bounded by the uncommitted tail instead of a fixed 5s window.
+"""
+import re
+
+import numpy as np
+
+from ring_buffer import PCMRingBuffer
+
+_NORMALIZE = re.compile(r"[^\w']+")
+
+
+def _norm(word: str) -> str:
+    return _NORMALIZE.sub("", word.lower())
+
+
+class StreamingTranscriber:
+    """
+    Per-session committed text + uncommitted audio/hypothesis.
+    Words are `(start, end, text)` tuples in seconds of stream time.
+
+    Audio lives in a fixed-capacity ring buffer (room for `max_buffer_seconds` of
+    uncommitted audio plus headroom for audio arriving during inference); the
+    uncommitted buffer is the range `[start, total_written)` of that ring.
+    """
+    def __init__(self, sample_rate: int = 16000, max_buffer_seconds: float = 15.0, prompt_chars: int = 200,
+                 headroom_seconds: float = 15.0):
+        self.sample_rate = sample_rate
+        self.max_buffer_seconds = max_buffer_seconds
+        self.prompt_chars = prompt_chars
+
+        self.ring = PCMRingBuffer(int((max_buffer_seconds + headroom_seconds) * sample_rate))
+        self.start = 0                                # absolute sample index of the uncommitted audio
+        self.hypothesis = []                          # uncommitted words from the last pass
+        self.committed_tail = []                      # last committed words (overlap removal)
+        self.committed_text = ""                      # recent committed text (prompt context)
+        self.last_committed_time = 0.0
+        self.partial_sent = ""                        # last partial delivered to the client
+
+    @property
+    def buffer_offset(self) -> float:
+        """Stream time (seconds) of the first uncommitted sample."""
+        return self.start / self.sample_rate
+
+    @property
+    def buffer_seconds(self) -> float:
+        return (self.ring.total_written - self.start) / self.sample_rate
+
+    @property
+    def buffer(self) -> np.ndarray:
+        """
+        Uncommitted audio as float32 (a fresh array per read, released with the pass
+        that uses it).
+        """
+        # Audio older than the ring capacity is gone; the buffer starts at the oldest sample held
+        self.start = max(self.start, self.ring.oldest_index)
+        return self.ring.read_float32(self.ring.total_written - self.start)
+
+    def window(self, max_samples: int) -> tuple:
+        """
+        The oldest `max_samples` of the uncommitted audio (float32, a fresh array like
+        `buffer`) and the absolute sample index where that window ends.
+        """
+        self.start = max(self.start, self.ring.oldest_index)
+        end = min(self.ring.total_written, self.start + max_samples)
+        return self.ring.read_float32(end - self.start, end=end), end
+
+    def insert_audio(self, audio: np.ndarray):
+        """Appends newly decoded 16 kHz audio (int16 or float32), copied into the ring."""
+        self.ring.write(audio)
+
+    def prompt(self) -> str:
+        """Committed context handed to Whisper as `initial_prompt`."""
+        return self.committed_text
+
+    def apply(self, words: list, end: int = None) -> tuple:
+        """
+        Merges the words of one pass over `self.buffer` (timestamps relative to the
+        buffer start). `end` is set for a capped window (`TrackBackpressure`): the pass
+        ended there and the backlog after it is still to be decoded.
+        Returns `(newly_committed_text, partial_text)`.
+        """
+        new = [(s + self.buffer_offset, e + self.buffer_offset, w) for s, e, w in words if w]
+        new = [w for w in new if w[0] > self.last_committed_time - 0.1]
+
+        # Drop words the model repeated from the already committed tail
+        if new and self.committed_tail and abs(new[0][0] - self.last_committed_time) < 1.0:
+            for n in range(min(len(self.committed_tail), len(new), 5), 0, -1):
+                if [_norm(w[2]) for w in self.committed_tail[-n:]] == [_norm(w[2]) for w in new[:n]]:
+                    new = new[n:]
+                    break
+
+        # LocalAgreement: commit the longest prefix shared with the previous pass
+        commit = []
+        for prev, cur in zip(self.hypothesis, new):
+            if _norm(prev[2]) != _norm(cur[2]):
+                break
+            commit.append(cur)
+        self.hypothesis = new[len(commit):]
+
+        # Never let the uncommitted tail grow unbounded: force-commit the hypothesis
+        if not commit and self.buffer_seconds > self.max_buffer_seconds and self.hypothesis:
+            commit, self.hypothesis = self.hypothesis, []
+
+        committed = self._commit(commit)
+
+        # Nothing pending (silence): keep at most `max_buffer_seconds` of audio. A capped
+        # window (backlog after `end`, not decoded yet) moves on to its end instead.
+        if not self.hypothesis:
+            if end is None or end >= self.ring.total_written:
+                self.start = max(self.start, self.ring.total_written - int(self.max_buffer_seconds * self.sample_rate))
+            else:
+                self.start = max(self.start, end)
+        return committed, " ".join(w[2] for w in self.hypothesis)
+
+    def skip_silence(self, index: int):
+        """Drops non-speech audio before absolute sample `index` while nothing is pending."""
+        if not self.hypothesis:
+            self.start = min(max(self.start, index), self.ring.total_written)
+
+    def drop_before(self, index: int) -> str:
+        """
+        Discards uncommitted audio before absolute sample `index` (backpressure). Pending
+        words that end before the cut were already decoded and are committed; words
+        straddling it are dropped with the audio. Returns the committed text.
+        """
+        cut_time = index / self.sample_rate
+        committed = self._commit([w for w in self.hypothesis if w[1] <= cut_time])
+        self.hypothesis = [w for w in self.hypothesis if w[0] >= cut_time]
+        self.start = min(max(self.start, index), self.ring.total_written)
+        return committed
+
+    def finalize(self, end: int = None) -> str:
+        """
+        Commits whatever is left (speech endpoint or end of stream) and clears the buffer
+        up to absolute sample `end` (default: everything received so far).
+        """
+        committed = self._commit(self.hypothesis)
+        self.hypothesis = []
+        self.start = self.ring.total_written if end is None else min(max(self.start, end), self.ring.total_written)
+        return committed
+
+    def _commit(self, words: list) -> str:
+        if not words:
+            return ""
+        text = " ".join(w[2] for w in words)
+        self.committed_text = f"{self.committed_text} {text}".strip()[-self.prompt_chars:]
+        self.committed_tail = (self.committed_tail + list(words))[-5:]
+        self.last_committed_time = words[-1][1]
+
+        # Trim committed audio from the front of the buffer
+        cut = int(self.last_committed_time * self.sample_rate)
+        self.start = min(max(self.start, cut), self.ring.total_written)
+        return text
@@ -0,0 +1,84 @@
+"""
+Content-addressed LRU cache of transcription results.
+
+Keys are a hash of the PCM window (normalised to int16, so float noise below one
+LSB does not defeat it) plus the language and decode options; values are whatever
+the backend returned (text or word tuples). The scheduler consults it for bulk
+chunks only, so re-uploaded files and retried jobs are answered without touching
+the model. Live windows are not cached: each one runs from the stream start to the
+newest audio with the committed text as its prompt, so it never repeats exactly.
+"""
+import hashlib
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+
+
+class TranscriptionCache:
+    """Bounded by an approximate memory budget (`max_bytes`) of cached results."""
+    MISS = object()
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self.entries = OrderedDict()  # key -> (result, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(audio: np.ndarray, language: str, vad_filter: bool, prompt: str, word_timestamps: bool,
+            model_tier: str = None) -> bytes:
+        if audio.dtype != np.int16:
+            audio = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        digest = hashlib.blake2b(np.ascontiguousarray(audio).data, digest_size=16)
+        digest.update(f"|{language}|{int(vad_filter)}|{int(word_timestamps)}|{model_tier or ''}|{prompt or ''}".encode("utf-8"))
+        return digest.digest()
+
+    @staticmethod
+    def _size(result) -> int:
+        if isinstance(result, str):
+            return sys.getsizeof(result)
+        # (start, end, word) tuples: tuple + two floats + the string
+        return sys.getsizeof(result) + sum(120 + len(w[2]) for w in result)
+
+    def get(self, key: bytes):
+        """Cached result, or `TranscriptionCache.MISS`."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            metrics.CACHE_LOOKUPS.inc(result="miss")
+            return self.MISS
+        self.entries.move_to_end(key)
+        self.hits += 1
+        metrics.CACHE_LOOKUPS.inc(result="hit")
+        return entry[0]
+
+    def put(self, key: bytes, result):
+        if result is None or key in self.entries:
+            return
+        size = self._size(result) + 64  # key + bookkeeping
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (result, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
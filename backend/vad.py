@@ -0,0 +1,104 @@
+"""
+Per-session streaming voice activity detection and endpointing.
+
+Audio is classified in fixed 30 ms frames as it arrives (webrtcvad when available,
+an energy threshold otherwise). A short majority window decides when an utterance
+starts; a hangover of non-speech frames marks its endpoint. Ingest paths only call
+the model while speech is active and run one final decode at each endpoint.
+"""
+import logging
+import os
+from collections import deque
+
+import numpy as np
+
+from dsp import level_dbfs
+
+logger = logging.getLogger("asr-worker")
+
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except Exception:
+    WEBRTCVAD_AVAILABLE = False
+
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", 2))
+VAD_ENDPOINT_MS = int(os.getenv("VAD_ENDPOINT_MS", 600))
+VAD_ENERGY_THRESHOLD_DBFS = float(os.getenv("VAD_ENERGY_THRESHOLD_DBFS", -45))
+
+
+class StreamingVAD:
+    """
+    Frame-level speech detector with utterance start/end tracking.
+    Sample indices are absolute (counted from the first sample fed).
+    """
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, start_ms: int = 150,
+                 endpoint_ms: int = VAD_ENDPOINT_MS, preroll_ms: int = 300,
+                 aggressiveness: int = VAD_AGGRESSIVENESS):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.endpoint_frames = max(1, endpoint_ms // frame_ms)
+        self.preroll_samples = sample_rate * preroll_ms // 1000
+
+        self.vad = webrtcvad.Vad(aggressiveness) if WEBRTCVAD_AVAILABLE else None
+        self._pending = np.zeros(self.frame_samples, dtype=np.int16)  # partial frame
+        self._pending_len = 0
+        self._recent = deque(maxlen=max(self.start_frames, self.endpoint_frames))
+
+        self.samples_seen = 0
+        self.in_speech = False
+        self.speech_start = 0       # absolute index where the current/last utterance began (incl. preroll)
+        self.endpoint_pending = False  # set at an endpoint, cleared by the ingest loop once handled
+        self.speech_frames = 0
+        self.silence_frames = 0
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        if self.vad is not None:
+            return self.vad.is_speech(frame.tobytes(), self.sample_rate)
+        return level_dbfs(frame) > VAD_ENERGY_THRESHOLD_DBFS
+
+    def process(self, samples: np.ndarray) -> bool:
+        """
+        Consumes new 16 kHz int16 samples. Returns True if an utterance ended
+        (speech endpoint) within them.
+        """
+        endpoint = False
+        offset = 0
+        n = len(samples)
+        while offset < n:
+            take = min(self.frame_samples - self._pending_len, n - offset)
+            self._pending[self._pending_len:self._pending_len + take] = samples[offset:offset + take]
+            self._pending_len += take
+            offset += take
+            if self._pending_len < self.frame_samples:
+                break
+
+            self._pending_len = 0
+            frame_end = self.samples_seen + offset
+            speech = self._is_speech(self._pending)
+            self._recent.append(speech)
+            if speech:
+                self.speech_frames += 1
+            else:
+                self.silence_frames += 1
+
+            recent = list(self._recent)
+            if not self.in_speech:
+                window = recent[-self.start_frames:]
+                if len(window) == self.start_frames and sum(window) * 2 > len(window):
+                    self.in_speech = True
+                    onset = frame_end - self.start_frames * self.frame_samples
+                    self.speech_start = max(0, onset - self.preroll_samples)
+            else:
+                window = recent[-self.endpoint_frames:]
+                if len(window) == self.endpoint_frames and not any(window):
+                    self.in_speech = False
+                    self.endpoint_pending = True
+                    endpoint = True
+        self.samples_seen += n
+        return endpoint
+
+    def speech_ratio(self) -> float:
+        total = self.speech_frames + self.silence_frames
+        return self.speech_frames / total if total else 0.0
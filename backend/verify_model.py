@@ -1,10 +1,27 @@
-from faster_whisper import WhisperModel
+"""
+Check that every configured model is in ASR_MODEL_DIR, matches its checksums and
+loads with the configured compute type, without any network access.
+"""
+import os
 import sys
 
-try:
-    print("Checking model availability...")
-    model = WhisperModel("tiny", device="cpu", compute_type="int8")
-    print("Model loaded successfully!")
-except Exception as e:
-    print(f"Error loading model: {e}")
+from dotenv import load_dotenv
+
+import model_store
+
+load_dotenv()
+failed = False
+compute_type = os.getenv("WHISPER_COMPUTE", "int8")
+print(f"Checking model availability in {model_store.model_dir()}...")
+for name in model_store.configured_models():
+    try:
+        path = model_store.verify(name, deep=True)
+        from faster_whisper import WhisperModel
+        WhisperModel(path, device=os.getenv("WHISPER_DEVICE", "cpu"), compute_type=compute_type)
+        print(f"Model '{name}' verified and loaded successfully!")
+    except Exception as e:
+        print(f"Error loading model '{name}': {e}")
+        failed = True
+
+if failed:
     sys.exit(1)
@@ -156,7 +156,7 @@ export function useLiveKit(): UseLiveKitReturn {
             console.log("WebSocket message:", data.type);
 
             if (data.type === "status") {
-              console.log("Server status - Whisper ready:", data.whisper_ready, "Mode:", data.mode);
+              console.log("Server status - Whisper ready:", data.whisper_ready, "State:", data.model_state, "Mode:", data.mode);
               setMode("live");
             }
 
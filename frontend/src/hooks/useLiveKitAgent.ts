@@ -95,12 +95,24 @@ export function useLiveKitAgent() {
                         // Fix Timestamp: Use relative time from session start
                         timestamp: data.timestamp ? (data.timestamp - sessionStartRef.current) : (Date.now() - sessionStartRef.current),
                         text: data.text,
-                        isFinal: true,
+                        isFinal: data.isFinal ?? true,
                         speaker: "Agent",
                         turnaround_ms: data.turnaround_ms
                     };
 
-                    setSegments(prev => [...prev, segment]);
+                    // Partials replace the previous partial; finals replace any partial
+                    setSegments(prev => {
+                        if (!segment.isFinal) {
+                            const existingIndex = prev.findIndex((s) => !s.isFinal);
+                            if (existingIndex >= 0) {
+                                const updated = [...prev];
+                                updated[existingIndex] = segment;
+                                return updated;
+                            }
+                            return [...prev, segment];
+                        }
+                        return [...prev.filter((s) => s.isFinal), segment];
+                    });
                 }
             } catch (e) {
                 console.error("Failed to parse data packet:", e);
@@ -93,9 +93,13 @@ export function useWebSocketOnly() {
                     const data = JSON.parse(event.data);
 
                     if (data.type === "status") {
-                        if (data.whisper_ready) {
-                            setIsModelReady(true);
-                        }
+                        // Sent on connect and again once a loading/warming model becomes ready
+                        setIsModelReady(!!data.whisper_ready);
+                    }
+
+                    if (data.type === "error") {
+                        console.error("[Direct] WS Error:", data.message);
+                        toast({ title: "Transcription Error", description: data.message, variant: "destructive" });
                     }
 
                     if (data.type === "transcript" && data.text) {
@@ -108,11 +112,23 @@ export function useWebSocketOnly() {
                             id: data.id || crypto.randomUUID(),
                             timestamp: data.timestamp ? (data.timestamp - sessionStartRef.current) : (Date.now() - sessionStartRef.current),
                             text: data.text,
-                            isFinal: true,
+                            isFinal: data.isFinal ?? true,
                             speaker: "User",
                             turnaround_ms: data.turnaround_ms
                         };
-                        setSegments(prev => [...prev, segment]);
+                        // Partials replace the previous partial; finals replace any partial
+                        setSegments(prev => {
+                            if (!segment.isFinal) {
+                                const existingIndex = prev.findIndex((s) => !s.isFinal);
+                                if (existingIndex >= 0) {
+                                    const updated = [...prev];
+                                    updated[existingIndex] = segment;
+                                    return updated;
+                                }
+                                return [...prev, segment];
+                            }
+                            return [...prev.filter((s) => s.isFinal), segment];
+                        });
                     }
                 } catch (e) {
                     console.error("Parse error", e);
@@ -42,7 +42,7 @@ export default function TestMode() {
   const [isModalOpen, setIsModalOpen] = useState(true);
   const [micStatus, setMicStatus] = useState<"idle" | "running" | "success" | "error">("idle");
 
-  const { data: healthData, isError: healthError, isLoading: healthLoading } = useQuery<{ status: string; timestamp: string; whisper_loaded: boolean }>({
+  const { data: healthData, isError: healthError, isLoading: healthLoading } = useQuery<{ status: string; timestamp: string; whisper_loaded: boolean; model_state?: "loading" | "warming" | "ready" | "failed" }>({
     queryKey: ["/api/health"],
     refetchInterval: 10000,
   });
@@ -135,7 +135,7 @@ export default function TestMode() {
 
   const frontendStatus = "ok";
   const backendStatus = healthError ? "error" : healthLoading ? "loading" : healthData?.status === "ok" ? "ok" : "idle";
-  const whisperStatus = healthData?.whisper_loaded ? "ok" : healthData?.status === "ok" ? "loading" : "idle";
+  const whisperStatus = healthData?.whisper_loaded ? "ok" : healthData?.model_state === "failed" ? "error" : healthData?.status === "ok" ? "loading" : "idle";
   const livekitStatus = status === "connected" ? "ok" : status === "connecting" ? "loading" : status === "error" ? "error" : "idle";
   const websocketStatus = wsConnected ? "ok" : isRecording ? "loading" : "idle";
 
@@ -202,8 +202,8 @@ export default function TestMode() {
     {
       id: "ai-model",
       label: "AI Neural Engine",
-      description: whisperStatus === "ok" ? "Faster-Whisper Ready" : "Loading Model...",
-      status: whisperStatus === "ok" ? "success" : "running",
+      description: whisperStatus === "ok" ? "Faster-Whisper Ready" : whisperStatus === "error" ? "Model failed to load" : healthData?.model_state === "warming" ? "Warming up model..." : "Loading Model...",
+      status: whisperStatus === "ok" ? "success" : whisperStatus === "error" ? "error" : "running",
       icon: <Zap className="h-4 w-4" />
     }
   ];